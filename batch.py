@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from dataset import all_metrics, metrics
+from scoring import compute_horsepower
+
+# Optional roster columns carried through to the results
+identity_columns = ['First Name', 'Last Name', 'Player Name', 'Age', 'Level', 'Position']
+
+
+def read_roster(source):
+    """
+    Read an uploaded roster CSV and coerce its metric columns to numbers.
+    """
+    roster = pd.read_csv(source)
+    roster.columns = [str(column).lstrip('\ufeff').strip() for column in roster.columns]
+
+    missing = [metric for metric in metrics if metric not in roster.columns]
+    if missing:
+        raise ValueError(f"Roster is missing the required columns: {', '.join(missing)}")
+
+    for metric in metrics:
+        roster[metric] = pd.to_numeric(roster[metric], errors='coerce')
+    return roster
+
+
+def score_roster(roster, data, percentile_index, match_index, group_by='Level', group_value=None):
+    """
+    Score every player in the roster at once.
+
+    Percentiles are taken against `group_value`, or against each player's own
+    `group_by` column when no value is given. A blank metric leaves its
+    percentile blank, and a blank Horsepower input leaves Horsepower and its
+    percentile blank.
+    """
+    results = roster[[column for column in identity_columns if column in roster.columns]].copy()
+    values = roster[metrics].to_numpy(dtype=float)
+
+    # Calculate Horsepower for every row
+    horsepower = compute_horsepower({metric: values[:, i] for i, metric in enumerate(metrics)})
+    values = np.column_stack((values, horsepower))
+    missing = np.isnan(values)
+    for i, metric in enumerate(all_metrics):
+        results[metric] = values[:, i]
+
+    # Percentiles, one vectorized lookup per cohort present in the roster
+    percentiles = np.full(values.shape, np.nan)
+    if group_value is not None:
+        cohorts = pd.Series(group_value, index=roster.index)
+    elif group_by in roster.columns:
+        cohorts = roster[group_by]
+    else:
+        raise ValueError(f"Roster has no '{group_by}' column to compare against")
+    if group_by == 'Age':
+        cohorts = pd.to_numeric(cohorts, errors='coerce')
+
+    for cohort, rows in pd.Series(np.arange(len(roster))).groupby(cohorts.to_numpy()).indices.items():
+        cohort_percentiles = percentile_index.percentiles(group_by, cohort, values[rows])
+        if cohort_percentiles is not None:
+            percentiles[rows] = cohort_percentiles
+    # The index scores a missing value as 0; report it as missing instead
+    percentiles[missing] = np.nan
+    for i, metric in enumerate(all_metrics):
+        results[f"{metric} Percentile"] = np.round(percentiles[:, i] * 100, 1)
+
+    # Closest match for every row in a single tree query
+    match_rows, match_distances = match_index.query_many(values)
+    found = match_rows >= 0
+    matched = data.iloc[match_rows[found]]
+    results['Closest Match'] = None
+    results['Closest Match Level'] = None
+    results.loc[found, 'Closest Match'] = (matched['First Name'].astype(str) + ' ' + matched['Last Name'].astype(str)).to_numpy()
+    results.loc[found, 'Closest Match Level'] = matched['Level'].to_numpy()
+    results['Match Distance'] = np.round(match_distances, 3)
+    return results
@@ -0,0 +1,163 @@
+"""
+Time each stage of the Horsepower pipeline on synthetic datasets.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 1000000 --output bench_output.json
+
+Each stage reports the best and median wall time over `--repeat` runs; the
+JSON report records the git commit so results can be compared across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import quantile_transform
+from scipy.spatial.distance import euclidean
+
+import dataset
+import plots
+from benchmarks.synthetic import write_dataset
+from dataset import all_metrics, levels, metrics
+from matching import ClosestMatchIndex
+from percentiles import PercentileIndex
+from scoring import ScoringEngine
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+# The row-by-row reference implementations are skipped above this size
+LEGACY_MAX_ROWS = 100000
+
+
+def time_stage(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {'best': min(timings), 'median': statistics.median(timings), 'repeat': repeat}
+
+
+def legacy_percentiles_within_group(data, columns):
+    # The quantile_transform based implementation the app used to run on every rerun
+    percentiles = pd.DataFrame(index=data.index)
+    for column in columns:
+        numeric_data = pd.to_numeric(data[column], errors='coerce').fillna(0)
+        percentiles[column] = quantile_transform(numeric_data.values.reshape(-1, 1), output_distribution='uniform').flatten()
+    return percentiles
+
+
+def legacy_input_percentiles(comparison_group, input_data):
+    input_data_percentiles = []
+    for i, metric in enumerate(all_metrics):
+        metric_values = pd.to_numeric(comparison_group[metric], errors='coerce').fillna(0)
+        input_data_percentiles.append(np.sum(metric_values < input_data[i]) / len(metric_values))
+    return input_data_percentiles
+
+
+def legacy_closest_match(data, input_data):
+    data_subset = data[all_metrics].dropna()
+    distances = data_subset.apply(lambda row: euclidean(input_data, row), axis=1)
+    return data.loc[distances.idxmin()]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_size(num_rows, workdir, repeat, legacy_max_rows):
+    csv_path = os.path.join(workdir, f"synthetic_{num_rows}.csv")
+    write_dataset(csv_path, num_rows)
+
+    stages = {}
+    stages['load_csv_cold'] = time_stage(lambda: dataset.build_snapshot(csv_path), 1)
+
+    def load_snapshot():
+        dataset._loaded.clear()
+        dataset.load_dataset(csv_path)
+    stages['load_snapshot'] = time_stage(load_snapshot, repeat)
+    data = dataset.load_dataset(csv_path)
+
+    input_metrics = {'Grip Strength (Bottom Hand)': 60.0, 'Grip Strength (Top Hand)': 62.0, 'Vertical Jump': 28.0, 'Med Ball SitUp': 22.0, 'Med Ball Chest': 21.5}
+    input_data = [input_metrics[metric] for metric in metrics]
+    input_data.append(input_data[2] + input_data[3] + input_data[4])
+
+    stages['cohort_filter'] = time_stage(lambda: data[data['Level'] == 'College'], repeat)
+    comparison_group = data[data['Level'] == 'College']
+
+    stages['percentile_index_build'] = time_stage(lambda: PercentileIndex(data), 1)
+    index = PercentileIndex(data)
+    stages['percentile_query'] = time_stage(lambda: index.percentiles('Level', 'College', input_data), repeat)
+    stages['group_average_percentiles'] = time_stage(lambda: index.group_average('Level', 'College'), repeat)
+    level_keys = [('Level', level) for level in levels]
+    index.ladder(level_keys, input_data)
+    stages['level_ladder'] = time_stage(lambda: index.ladder(level_keys, input_data), repeat)
+    stages['level_ladder_per_level'] = time_stage(lambda: [index.percentiles(*key, input_data) for key in level_keys], repeat)
+
+    match_index = ClosestMatchIndex(data)
+    stages['match_index_build'] = time_stage(lambda: ClosestMatchIndex(data), 1)
+    stages['closest_match_query'] = time_stage(lambda: match_index.query(input_data, k=5), repeat)
+    stages['engine_build'] = time_stage(lambda: ScoringEngine(data), 1)
+
+    if num_rows <= legacy_max_rows:
+        stages['legacy_percentile_loop'] = time_stage(lambda: legacy_input_percentiles(comparison_group, input_data), repeat)
+        stages['legacy_get_percentiles_within_group'] = time_stage(lambda: legacy_percentiles_within_group(comparison_group, all_metrics), repeat)
+        stages['legacy_closest_match'] = time_stage(lambda: legacy_closest_match(data, input_data), 1)
+
+    stages['kde_density_grid'] = time_stage(lambda: plots.compute_density_grid(comparison_group['Vertical Jump']), repeat)
+    density_grids = {metric: plots.compute_density_grid(comparison_group[metric]) for metric in metrics}
+
+    percentiles = index.percentiles('Level', 'College', input_data)
+    averages = index.group_average('Level', 'College')
+    stages['plot_radar'] = time_stage(lambda: plots.plot_radar(percentiles, averages, all_metrics, 'Bench', 'College Level Average'), repeat)
+    stages['plot_radar_fixed_mean'] = time_stage(lambda: plots.plot_radar_fixed_mean(np.ones(len(metrics)), np.full(len(metrics), 0.2), metrics, 'Bench'), repeat)
+    stages['plot_metric'] = time_stage(lambda: plots.plot_metric(all_metrics[0], percentiles[0] * 100, input_data[0]), repeat)
+    bars = plots.metric_panel_bars(all_metrics, percentiles * 100, input_data)
+    stages['plot_metric_panel_uncached'] = time_stage(lambda: plots._render_metric_panel(bars), repeat)
+    stages['plot_metric_panel_cached'] = time_stage(lambda: plots.plot_metric_panel(all_metrics, percentiles * 100, input_data), repeat)
+    stages['plot_metric_distributions'] = time_stage(lambda: plots.plot_metric_distributions(input_metrics, density_grids, metrics, 'Bench'), repeat)
+
+    return {'rows': num_rows, 'stages': stages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Horsepower pipeline on synthetic data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Dataset sizes to generate")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per stage")
+    parser.add_argument('--legacy-max-rows', type=int, default=LEGACY_MAX_ROWS, help="Largest size the row-by-row reference code runs on")
+    parser.add_argument('--output', default='bench_output.json', help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for num_rows in args.sizes:
+            result = benchmark_size(num_rows, workdir, args.repeat, args.legacy_max_rows)
+            report['results'].append(result)
+            print(f"{num_rows:>9} rows: " + ", ".join(f"{name} {timing['best'] * 1000:.1f}ms" for name, timing in result['stages'].items()))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Synthetic datasets matching the CleanHPdata4.csv schema, for benchmarking at scale.
+"""
+import numpy as np
+import pandas as pd
+
+# Column order of CleanHPdata4.csv
+columns = ['First Name', 'Last Name', 'Age', 'Level', 'Position', 'Hand Width', 'Hand Length', 'Forearm Length', 'Upper Arm Length', 'Wrist to Floor', 'Hip to Floor', 'Height (cm)', 'Weight (kg)', 'Wingspan', 'Bats', 'Throws', 'Dominant Eye', 'Grip Strength (LH)', 'Grip Strength (RH)', 'Grip Strength (Bottom Hand)', 'Grip Strength (Top Hand)', 'Combined Grip', 'Vertical Jump', 'Med Ball SitUp', 'Med Ball Chest', 'Horsepower']
+
+# Share of each level and its (mean, std) for age and the tested metrics, taken from CleanHPdata4.csv
+level_profiles = {
+    'Youth': (0.30, (12.0, 1.7), (26.5, 10.8), (17.7, 3.4), (13.2, 3.9), (14.9, 3.1), (158.7, 14.3), (49.1, 14.0)),
+    'High School': (0.31, (16.0, 1.1), (48.5, 10.6), (25.1, 3.7), (18.9, 3.4), (19.5, 2.9), (179.8, 7.7), (76.7, 12.1)),
+    'College': (0.08, (19.7, 1.1), (59.6, 10.5), (28.3, 4.4), (22.5, 2.8), (21.6, 2.5), (183.2, 6.5), (89.3, 9.0)),
+    'Minors': (0.11, (22.1, 2.2), (66.8, 8.8), (29.6, 3.7), (25.2, 3.0), (23.8, 2.4), (183.1, 6.0), (93.5, 10.0)),
+    'MLB': (0.20, (26.7, 3.8), (68.7, 8.5), (28.6, 4.0), (25.6, 2.5), (24.2, 2.1), (186.9, 5.5), (97.7, 8.0)),
+}
+
+position_shares = {
+    None: 0.29, 'Corner OF': 0.16, 'First Base': 0.10, 'Second Base': 0.09, 'Catcher': 0.09,
+    'Third Base': 0.09, 'Shortstop': 0.08, 'Centerfield': 0.08, 'Pitcher': 0.02,
+}
+
+first_names = ['Jack', 'Dylan', 'Jackson', 'Jacob', 'Alex', 'Hayden', 'Luke', 'Ryan', 'Tyler', 'Owen', 'Mason', 'Evan']
+last_names = ['Smith', 'Jung', 'Ainsworth', 'Peyton', 'Travinski', 'Milazzo', 'Garcia', 'Lee', 'Brown', 'Diaz', 'Kim', 'Nolan']
+
+
+def _choice(rng, shares, size):
+    options = list(shares)
+    weights = np.array(list(shares.values()), dtype=float)
+    return np.array(options, dtype=object)[rng.choice(len(options), size=size, p=weights / weights.sum())]
+
+
+def _with_missing(rng, values, share):
+    values = values.astype(float)
+    values[rng.random(len(values)) < share] = np.nan
+    return values
+
+
+def generate_dataset(num_rows, seed=0):
+    """
+    Return a DataFrame of `num_rows` synthetic athletes with CleanHPdata4.csv's columns.
+    """
+    rng = np.random.default_rng(seed)
+    level_names = list(level_profiles)
+    level = rng.choice(len(level_names), size=num_rows, p=[profile[0] for profile in level_profiles.values()])
+    profiles = np.array([[stat for pair in profile[1:] for stat in pair] for profile in level_profiles.values()])[level]
+
+    def sample(i, low=0.0):
+        return np.clip(rng.normal(profiles[:, 2 * i], profiles[:, 2 * i + 1]), low, None)
+
+    age = np.round(sample(0, 7))
+    grip_bottom = np.round(sample(1, 5))
+    grip_top = np.round(np.clip(grip_bottom + rng.normal(0, 4, num_rows), 5, None))
+    vertical = np.round(sample(2, 5), 1)
+    situp = np.round(sample(3, 3), 2)
+    chest = np.round(sample(4, 3), 2)
+    height = np.round(sample(5, 120))
+    weight = np.round(sample(6, 25))
+
+    bottom_is_left = rng.random(num_rows) < 0.7
+    data = pd.DataFrame({
+        'First Name': np.array(first_names, dtype=object)[rng.integers(0, len(first_names), num_rows)],
+        'Last Name': np.char.add(np.array(last_names)[rng.integers(0, len(last_names), num_rows)], rng.integers(0, 1000, num_rows).astype(str)),
+        'Age': age.astype(int),
+        'Level': np.array(level_names, dtype=object)[level],
+        'Position': _choice(rng, position_shares, num_rows),
+        'Hand Width': _with_missing(rng, np.round(height * 0.053), 0.14),
+        'Hand Length': _with_missing(rng, np.round(height * 0.11), 0.14),
+        'Forearm Length': _with_missing(rng, np.round(height * 0.2), 0.14),
+        'Upper Arm Length': _with_missing(rng, np.round(height * 0.17), 0.14),
+        'Wrist to Floor': _with_missing(rng, np.round(height * 0.48), 0.11),
+        'Hip to Floor': _with_missing(rng, np.round(height * 0.56), 0.11),
+        'Height (cm)': _with_missing(rng, height, 0.10),
+        'Weight (kg)': _with_missing(rng, weight, 0.11),
+        'Wingspan': _with_missing(rng, np.round(height * rng.normal(1.0, 0.02, num_rows)), 0.12),
+        'Bats': _choice(rng, {'Right': 0.69, 'Left': 0.28, 'Switch': 0.02, 'Both': 0.01}, num_rows),
+        'Throws': _choice(rng, {'Right': 0.9, 'Left': 0.1}, num_rows),
+        'Dominant Eye': _choice(rng, {'Right': 0.57, 'Left': 0.32, None: 0.1, 'Both': 0.01}, num_rows),
+        'Grip Strength (LH)': np.where(bottom_is_left, grip_bottom, grip_top),
+        'Grip Strength (RH)': np.where(bottom_is_left, grip_top, grip_bottom),
+        'Grip Strength (Bottom Hand)': grip_bottom,
+        'Grip Strength (Top Hand)': grip_top,
+        'Combined Grip': grip_bottom + grip_top,
+        'Vertical Jump': vertical,
+        'Med Ball SitUp': situp,
+        'Med Ball Chest': chest,
+        'Horsepower': np.round(vertical + situp + chest, 2),
+    })
+    return data[columns]
+
+
+def write_dataset(path, num_rows, seed=0):
+    generate_dataset(num_rows, seed).to_csv(path, index=False)
+    return path
@@ -0,0 +1,265 @@
+"""
+Vega-Lite versions of the app's charts, drawn by the browser instead of rasterized here.
+
+Each function takes the same inputs as its matplotlib counterpart in plots.py
+and returns a JSON-ready spec for `st.vega_lite_chart`. The specs carry only
+the plotted points (a few KB) instead of a PNG.
+"""
+import numpy as np
+
+# Colors shared with the matplotlib charts
+PLAYER_COLOR = '#f08080'  # lightcoral
+COMPARISON_COLOR = '#6495ed'  # cornflowerblue
+BAND_COLOR = 'grey'
+
+# Points kept from each cached density curve
+DISTRIBUTION_POINTS = 125
+
+RADAR_SIZE = 420
+
+
+def _polar(radius, angle):
+    # Same orientation as matplotlib's polar axes: 0 rad points right, counter-clockwise
+    return float(radius * np.cos(angle)), float(radius * np.sin(angle))
+
+
+def _angles(num_vars):
+    return np.linspace(0, 2 * np.pi, num_vars, endpoint=False)
+
+
+def _polygon_rows(series, values, angles):
+    rows = []
+    for order, (value, angle) in enumerate(zip(values, angles)):
+        x, y = _polar(float(value), angle)
+        rows.append({'series': series, 'order': order, 'x': x, 'y': y})
+    return rows
+
+
+def _band_rows(series, lower, upper, angles):
+    # One ring: the upper bound around and back to its start, then the lower bound the other way
+    angles = np.append(angles, angles[0])
+    outer = _polygon_rows(series, np.append(upper, upper[0]), angles)
+    inner = _polygon_rows(series, np.append(lower, lower[0])[::-1], angles[::-1])
+    return [dict(row, order=order) for order, row in enumerate(outer + inner)]
+
+
+def radar_spec(series, categories, ticks, tick_labels=None, note="", band=None):
+    """
+    Radar chart from (label, values, color, fill opacity, dash) series; values share the radius scale of `ticks`.
+
+    `band` is an optional (label, lower, upper, color, fill opacity) ring shaded between two radii.
+    """
+    angles = _angles(len(categories))
+    extent = ticks[-1] * 1.25
+    position = {
+        'x': {'field': 'x', 'type': 'quantitative', 'scale': {'domain': [-extent, extent]}, 'axis': None},
+        'y': {'field': 'y', 'type': 'quantitative', 'scale': {'domain': [-extent, extent]}, 'axis': None},
+    }
+
+    # Grid rings, spokes and labels
+    rings = [row for tick in ticks[1:] for row in _polygon_rows(f"ring {tick}", [tick] * len(categories), angles)]
+    spokes = []
+    labels = []
+    for category, angle in zip(categories, angles):
+        x2, y2 = _polar(ticks[-1], angle)
+        spokes.append({'x': 0.0, 'y': 0.0, 'x2': x2, 'y2': y2})
+        x, y = _polar(ticks[-1] * 1.12, angle)
+        labels.append({'x': x, 'y': y, 'label': category})
+    layers = [
+        {
+            'data': {'values': rings},
+            'mark': {'type': 'line', 'interpolate': 'linear-closed', 'stroke': '#dddddd', 'strokeWidth': 1},
+            'encoding': dict(position, detail={'field': 'series'}, order={'field': 'order'}),
+        },
+        {
+            'data': {'values': spokes},
+            'mark': {'type': 'rule', 'stroke': '#dddddd'},
+            'encoding': dict(position, x2={'field': 'x2'}, y2={'field': 'y2'}),
+        },
+        {
+            'data': {'values': labels},
+            'mark': {'type': 'text', 'fontSize': 11},
+            'encoding': dict(position, text={'field': 'label'}),
+        },
+    ]
+    if tick_labels:
+        tick_rows = [{'x': 0.0, 'y': float(tick), 'label': label} for tick, label in zip(ticks, tick_labels)]
+        layers.append({
+            'data': {'values': tick_rows},
+            'mark': {'type': 'text', 'color': 'grey', 'fontSize': 9, 'dx': 8},
+            'encoding': dict(position, text={'field': 'label'}),
+        })
+
+    domain = [label for label, *_ in series]
+    colors = [color for _, _, color, *_ in series]
+    if band:
+        label, lower, upper, color, fill_opacity = band
+        domain.insert(0, label)
+        colors.insert(0, color)
+    legend = {'field': 'series', 'type': 'nominal', 'title': None, 'scale': {'domain': domain, 'range': colors}, 'legend': {'orient': 'top'}}
+    if band:
+        layers.append({
+            'data': {'values': _band_rows(label, lower, upper, angles)},
+            'mark': {'type': 'line', 'interpolate': 'linear', 'strokeWidth': 0, 'fill': color, 'fillOpacity': fill_opacity},
+            'encoding': dict(position, order={'field': 'order'}, color=legend),
+        })
+    for label, values, color, fill_opacity, dash in series:
+        mark = {'type': 'line', 'interpolate': 'linear-closed', 'strokeWidth': 2, 'fill': color, 'fillOpacity': fill_opacity}
+        if dash:
+            mark['strokeDash'] = [4, 3]
+        layers.append({
+            'data': {'values': _polygon_rows(label, values, angles)},
+            'mark': mark,
+            'encoding': dict(position, order={'field': 'order'}, color=legend),
+        })
+
+    spec = {
+        '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+        'width': RADAR_SIZE,
+        'height': RADAR_SIZE,
+        'view': {'stroke': None},
+        'layer': layers,
+    }
+    if note:
+        spec['title'] = {'text': '', 'subtitle': note, 'orient': 'bottom', 'subtitleColor': 'grey', 'subtitleFontSize': 10}
+    return spec
+
+
+def radar_chart_spec(input_data, comparison_data, categories, player_name, comparison_label, note=""):
+    """
+    Spec counterpart of `plots.plot_radar` (percentiles on a 0-1 radius).
+    """
+    return radar_spec(
+        [
+            (f"{player_name}'s Data" if player_name else 'Input Data', input_data, PLAYER_COLOR, 0.25, False),
+            (comparison_label, comparison_data, COMPARISON_COLOR, 0.25, False),
+        ],
+        categories,
+        ticks=list(np.linspace(0, 1, 6)),
+        tick_labels=['0', '20', '40', '60', '80', '100'],
+        note=note,
+    )
+
+
+def radar_fixed_mean_spec(input_data, std_devs, categories, player_name, note=""):
+    """
+    Spec counterpart of `plots.plot_radar_fixed_mean` (values as shares of the group mean).
+    """
+    std_devs = np.asarray(std_devs, dtype=float)
+    return radar_spec(
+        [
+            ("Group Average", np.ones(len(categories)), 'black', 0, False),
+            (f"{player_name}'s Data", input_data, PLAYER_COLOR, 0.25, False),
+        ],
+        categories,
+        ticks=list(np.linspace(0, 1.5, 6)),
+        note=note,
+        band=("± 1 Std Dev", np.clip(1 - std_devs, 0, None), 1 + std_devs, BAND_COLOR, 0.3),
+    )
+
+
+def metric_panel_spec(categories, player_percentiles, player_values):
+    """
+    Spec counterpart of `plots.plot_metric_panel`: one percentile bar per metric with its value alongside.
+    """
+    rows = [
+        {'metric': metric, 'percentile': round(float(percentile), 1), 'rounded': str(round(float(percentile))), 'value': f"{float(value):.2f}"}
+        for metric, percentile, value in zip(categories, player_percentiles, player_values)
+    ]
+    y = {'field': 'metric', 'type': 'nominal', 'sort': list(categories), 'title': None}
+    return {
+        '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+        'data': {'values': rows},
+        'height': {'step': 34},
+        'encoding': {'y': y},
+        'layer': [
+            {
+                'mark': {'type': 'bar', 'stroke': 'black', 'strokeWidth': 0.5},
+                'encoding': {
+                    'x': {'field': 'percentile', 'type': 'quantitative', 'scale': {'domain': [0, 100]}, 'title': 'Percentile'},
+                    'color': {'field': 'percentile', 'type': 'quantitative', 'scale': {'scheme': 'redblue', 'reverse': True, 'domain': [0, 100]}, 'legend': None},
+                    'tooltip': [{'field': 'metric'}, {'field': 'percentile', 'title': 'Percentile'}, {'field': 'value', 'title': 'Value'}],
+                },
+            },
+            {
+                'mark': {'type': 'text', 'align': 'right', 'dx': -4, 'color': 'white', 'fontSize': 10},
+                'encoding': {'x': {'field': 'percentile', 'type': 'quantitative'}, 'text': {'field': 'rounded'}},
+            },
+            {
+                'mark': {'type': 'text', 'align': 'left', 'dx': 6, 'fontSize': 10},
+                'encoding': {'x': {'datum': 100}, 'text': {'field': 'value'}},
+            },
+        ],
+    }
+
+
+def metric_distributions_spec(input_metrics, density_grids, categories, player_name, points=DISTRIBUTION_POINTS):
+    """
+    Spec counterpart of `plots.plot_metric_distributions`, drawn from the same cached density grids.
+    """
+    charts = []
+    for metric in categories:
+        grid = density_grids[metric]
+        step = max(1, len(grid['x_vals']) // points)
+        curve = [{'x': float(x), 'y': float(y)} for x, y in zip(grid['x_vals'][::step], grid['y_vals'][::step])]
+        band = [{'x': float(x), 'y': float(y)} for x, y in zip(grid['std_x_vals'][::step], grid['std_y_vals'][::step])]
+        x = {'field': 'x', 'type': 'quantitative', 'title': None, 'scale': {'domain': [float(grid['x_min']), float(grid['x_max'])], 'nice': False}}
+        y = {'field': 'y', 'type': 'quantitative', 'axis': None}
+        layers = [
+            {'data': {'values': curve}, 'mark': {'type': 'area', 'color': 'royalblue', 'opacity': 0.3, 'line': {'color': 'royalblue'}}, 'encoding': {'x': x, 'y': y}},
+            {'data': {'values': band}, 'mark': {'type': 'area', 'color': 'cornflowerblue', 'opacity': 0.4}, 'encoding': {'x': x, 'y': y}},
+        ]
+
+        input_value = float(input_metrics[metric])
+        if grid['x_min'] <= input_value <= grid['x_max']:
+            marker = [{'x': input_value, 'y': float(np.interp(input_value, grid['x_vals'], grid['y_vals'])), 'y0': 0.0, 'label': f"{player_name}'s Value"}]
+            layers.append({'data': {'values': marker}, 'mark': {'type': 'rule', 'color': PLAYER_COLOR, 'strokeWidth': 2}, 'encoding': {'x': x, 'y': y, 'y2': {'field': 'y0'}}})
+            layers.append({'data': {'values': marker}, 'mark': {'type': 'point', 'filled': True, 'color': 'coral', 'size': 60}, 'encoding': {'x': x, 'y': y, 'tooltip': [{'field': 'label', 'title': None}, {'field': 'x', 'title': metric}]}})
+        charts.append({'title': f"{metric} Distribution", 'height': 120, 'layer': layers})
+
+    return {
+        '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+        'vconcat': charts,
+        'resolve': {'scale': {'x': 'independent', 'y': 'independent'}},
+    }
+
+
+def ladder_heatmap_spec(percentiles, cohorts, categories, player_name):
+    """
+    Spec counterpart of `plots.plot_ladder_heatmap`: one row per (group_by, value) cohort, one column per metric.
+    """
+    row_labels = [str(value) for _, value in cohorts]
+    rows = []
+    for (group_by, value), label, cohort_percentiles in zip(cohorts, row_labels, percentiles):
+        for metric, percentile in zip(categories, cohort_percentiles):
+            if not np.isnan(percentile):
+                rows.append({'cohort': label, 'group': group_by, 'metric': metric, 'percentile': round(float(percentile) * 100, 1), 'rounded': str(round(float(percentile) * 100))})
+
+    position = {
+        'x': {'field': 'metric', 'type': 'nominal', 'sort': list(categories), 'title': None, 'axis': {'labelAngle': -30, 'orient': 'top'}},
+        'y': {'field': 'cohort', 'type': 'nominal', 'sort': row_labels, 'title': None},
+    }
+    return {
+        '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+        'title': f"{player_name}'s Percentile at Every Level and Position" if player_name else "Percentile at Every Level and Position",
+        'data': {'values': rows},
+        'height': {'step': 26},
+        'layer': [
+            {
+                'mark': 'rect',
+                'encoding': dict(
+                    position,
+                    color={'field': 'percentile', 'type': 'quantitative', 'scale': {'scheme': 'redblue', 'reverse': True, 'domain': [0, 100]}, 'title': 'Percentile'},
+                    tooltip=[{'field': 'group'}, {'field': 'cohort'}, {'field': 'metric'}, {'field': 'percentile', 'title': 'Percentile'}],
+                ),
+            },
+            {
+                'mark': {'type': 'text', 'fontSize': 10},
+                'encoding': dict(
+                    position,
+                    text={'field': 'rounded'},
+                    color={'condition': {'test': 'abs(datum.percentile - 50) > 30', 'value': 'white'}, 'value': 'black'},
+                ),
+            },
+        ],
+    }
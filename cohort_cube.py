@@ -0,0 +1,287 @@
+"""
+Precomputed cohort statistics for every Level x Position x Age cell.
+
+    python cohort_cube.py CleanHPdata4.csv --workers 4
+
+writes counts, means and standard deviations for each cell (plus the "any"
+marginals and the composite positions) to a directory of .npy files next to
+the CSV. The app memory-maps them at startup, so every mean/std comparison is
+a lookup instead of a groupby. Percentiles come from the exact sorted arrays
+of `PercentileIndex` instead.
+"""
+import argparse
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dataset import (
+    DEFAULT_CSV, all_metrics, composite_positions, load_dataset, replace_atomically, sidecar_path, source_digest, source_signature,
+)
+from profiling import timed
+from sketches import RunningMoments
+
+# Bump whenever the artifact layout changes
+CUBE_VERSION = 3
+
+# Directory of .npy files kept next to the source CSV
+CUBE_SUFFIX = '.cube'
+
+
+def cell_stats(values):
+    """
+    (count, per-metric counts, means, std devs) of one cohort's (rows x metrics) values.
+    """
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        counts = (~np.isnan(values)).sum(axis=0)
+        means = np.nanmean(values, axis=0)
+        stds = np.nanstd(values, axis=0, ddof=1)
+    return len(values), counts, means, stds
+
+
+def _labels(series):
+    # Plain string array with '' for missing labels, safe for np.isin and equality tests
+    return series.astype(object).where(series.notna(), '').to_numpy(dtype=str)
+
+
+def _position_groups(positions):
+    groups = {None: np.arange(len(positions))}
+    for position in sorted(set(positions) - {''}):
+        groups[str(position)] = np.flatnonzero(positions == position)
+    for name, members in composite_positions.items():
+        rows = np.flatnonzero(np.isin(positions, members))
+        if len(rows):
+            groups[name] = rows
+    return groups
+
+
+def build_level_slice(level, values, positions, ages):
+    """
+    Stats for every Position x Age cell of one level (or of everyone when `level` is None).
+
+    Runs in a worker process; returns a list of ((level, position, age), stats).
+    """
+    cells = []
+    for position, rows in _position_groups(positions).items():
+        cells.append(((level, position, None), cell_stats(values[rows])))
+
+        # Split the position's rows by age with one sort
+        cohort_ages = ages[rows]
+        known = ~np.isnan(cohort_ages)
+        rows, cohort_ages = rows[known], cohort_ages[known]
+        order = np.argsort(cohort_ages, kind='stable')
+        unique_ages, starts = np.unique(cohort_ages[order], return_index=True)
+        for age, age_rows in zip(unique_ages, np.split(rows[order], starts[1:])):
+            cells.append(((level, position, float(age)), cell_stats(values[age_rows])))
+    return cells
+
+
+@timed('cohort_cube_build')
+def build_cube(csv_path=DEFAULT_CSV, workers=None):
+    """
+    Compute every cell in a process pool (one task per level) and write the artifact.
+    """
+    data = load_dataset(csv_path)
+    values = data[all_metrics].to_numpy(dtype=float)
+    levels = _labels(data['Level'])
+    positions = _labels(data['Position'])
+    ages = data['Age'].to_numpy(dtype=float)
+
+    tasks = [(None, values, positions, ages)]
+    for level in sorted(set(levels) - {''}):
+        rows = np.flatnonzero(levels == level)
+        tasks.append((str(level), values[rows], positions[rows], ages[rows]))
+
+    if workers == 1:
+        slices = [build_level_slice(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            slices = list(pool.map(build_level_slice, *zip(*tasks)))
+    cells = [cell for level_slice in slices for cell in level_slice]
+
+    signature = source_signature(csv_path)
+    manifest = {
+        'version': CUBE_VERSION,
+        'signature': list(signature),
+        'digest': source_digest(csv_path),
+        'metrics': all_metrics,
+        'cohorts': [list(key) for key, _ in cells],
+    }
+    arrays = {
+        'sizes': np.array([stats[0] for _, stats in cells], dtype=np.int64),
+        'counts': np.array([stats[1] for _, stats in cells], dtype=np.int64),
+        'means': np.array([stats[2] for _, stats in cells], dtype=np.float64),
+        'stds': np.array([stats[3] for _, stats in cells], dtype=np.float64),
+    }
+    try:
+        write_cube(sidecar_path(csv_path, CUBE_SUFFIX), manifest, arrays)
+    except OSError:
+        # A read-only checkout still gets the in-memory cube
+        pass
+    return CohortCube(manifest, arrays)
+
+
+def write_cube(path, manifest, arrays):
+    # Build the new artifact beside the old one and swap it in
+    def write(tmp_path):
+        os.makedirs(tmp_path)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+    replace_atomically(path, write)
+
+
+class CohortCube:
+    """
+    Read-only view over the cohort statistics; cells are addressed by (level, position, age),
+    with None meaning "any".
+    """
+
+    def __init__(self, manifest, arrays):
+        self.manifest = manifest
+        self.metrics = manifest['metrics']
+        self.sizes = arrays['sizes']
+        self.counts = arrays['counts']
+        self.means = arrays['means']
+        self.stds = arrays['stds']
+        self._cells = {self._key(*key): i for i, key in enumerate(manifest['cohorts'])}
+
+    @staticmethod
+    def _key(level=None, position=None, age=None):
+        return level, position, None if age is None else float(age)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            for name in ('sizes', 'counts', 'means', 'stds')
+        }
+        return cls(manifest, arrays)
+
+    def cell(self, level=None, position=None, age=None):
+        """
+        Index of the cell, or None if that cohort is empty.
+        """
+        return self._cells.get(self._key(level, position, age))
+
+    def size(self, level=None, position=None, age=None):
+        cell = self.cell(level, position, age)
+        return 0 if cell is None else int(self.sizes[cell])
+
+    def mean(self, cell, columns):
+        return np.array([self.means[cell, self.metrics.index(column)] for column in columns])
+
+    def std(self, cell, columns):
+        return np.array([self.stds[cell, self.metrics.index(column)] for column in columns])
+
+    def with_cells(self, cells, signature, digest):
+        """
+        New cube with the given cells' stats replaced (or added); every other cell is copied as is.
+
+        `cells` maps (level, position, age) keys to `cell_stats` results.
+        """
+        manifest = dict(self.manifest, signature=list(signature), digest=digest, cohorts=list(self.manifest['cohorts']))
+        arrays = {name: np.array(array) for name, array in self.arrays().items()}
+        appended = {name: [] for name in arrays}
+        for key, stats in cells.items():
+            cell = self.cell(*key)
+            if cell is None:
+                manifest['cohorts'].append(list(self._key(*key)))
+                for name, value in zip(arrays, stats):
+                    appended[name].append(value)
+            else:
+                for name, value in zip(arrays, stats):
+                    arrays[name][cell] = value
+        for name, values in appended.items():
+            if values:
+                arrays[name] = np.concatenate((arrays[name], np.array(values, dtype=arrays[name].dtype)))
+        return CohortCube(manifest, arrays)
+
+    def arrays(self):
+        # In cell_stats order
+        return {'sizes': self.sizes, 'counts': self.counts, 'means': self.means, 'stds': self.stds}
+
+
+def affected_cells(levels, positions, ages):
+    """
+    Every (level, position, age) cell, "any" marginals included, that contains one of the given players.
+    """
+    cells = set()
+    for level, position, age in zip(levels, positions, ages):
+        level_keys = {None} | ({str(level)} if isinstance(level, str) else set())
+        position_keys = {None}
+        if isinstance(position, str):
+            position_keys.add(position)
+            position_keys.update(name for name, members in composite_positions.items() if position in members)
+        age_keys = {None} | (set() if age is None or np.isnan(age) else {float(age)})
+        cells.update((l, p, a) for l in level_keys for p in position_keys for a in age_keys)
+    return cells
+
+
+def updated_cube(cube, batch, signature, digest):
+    """
+    The cube with `batch` appended, merging only the batch rows' moments into the cells they fall into.
+    """
+    values = batch[all_metrics].to_numpy(dtype=float)
+    levels = _labels(batch['Level'])
+    positions = _labels(batch['Position'])
+    ages = batch['Age'].to_numpy(dtype=float)
+
+    cells = {}
+    for level, position, age in affected_cells(batch['Level'].tolist(), batch['Position'].tolist(), batch['Age'].tolist()):
+        rows = np.ones(len(batch), dtype=bool)
+        if level is not None:
+            rows &= levels == level
+        if position is not None:
+            rows &= np.isin(positions, composite_positions.get(position, [position]))
+        if age is not None:
+            rows &= ages == age
+
+        moments = RunningMoments(len(all_metrics)).update_many(values[rows])
+        size = int(rows.sum())
+        cell = cube.cell(level, position, age)
+        if cell is not None:
+            moments = RunningMoments.from_summary(cube.counts[cell], cube.means[cell], cube.stds[cell]).merge(moments)
+            size += int(cube.sizes[cell])
+        cells[(level, position, age)] = size, moments.counts.astype(np.int64), moments.mean(), moments.std()
+    return cube.with_cells(cells, signature, digest)
+
+
+def load_cube(csv_path=DEFAULT_CSV, build_if_stale=True, workers=1):
+    """
+    Load the cube for the CSV, rebuilding it if it is missing or out of date.
+    """
+    path = sidecar_path(csv_path, CUBE_SUFFIX)
+    try:
+        cube = CohortCube.load(path)
+    except (OSError, ValueError, KeyError):
+        cube = None
+
+    if cube is not None and cube.manifest.get('version') == CUBE_VERSION:
+        if tuple(cube.manifest['signature']) == source_signature(csv_path):
+            return cube
+        if cube.manifest['digest'] == source_digest(csv_path):
+            return cube
+    if not build_if_stale:
+        return None
+    return build_cube(csv_path, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute cohort statistics for the app.")
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV, help="Source dataset")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    cube = build_cube(args.csv, args.workers)
+    print(f"Wrote {len(cube.sizes)} cohorts to {sidecar_path(args.csv, CUBE_SUFFIX)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+import hashlib
+import io
+import itertools
+import os
+import pickle
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from profiling import count, stage
+
+# Default source export used by the app
+DEFAULT_CSV = 'CleanHPdata4.csv'
+
+# Metrics to compare
+metrics = ['Grip Strength (Bottom Hand)', 'Grip Strength (Top Hand)', 'Vertical Jump', 'Med Ball SitUp', 'Med Ball Chest']
+all_metrics = metrics + ['Horsepower']
+
+# Define levels
+levels = ['High School', 'College', 'Minors', 'MLB']
+
+# Body measurements recorded in CleanHPdata4.csv that can optionally join the closest-match search
+anthropometric_columns = ['Hand Width', 'Hand Length', 'Forearm Length', 'Upper Arm Length', 'Wrist to Floor', 'Hip to Floor', 'Height (cm)', 'Weight (kg)', 'Wingspan']
+
+# Low-cardinality text columns stored as categoricals
+categorical_columns = ['Level', 'Position', 'Bats', 'Throws', 'Dominant Eye']
+
+# The only source columns the app reads; everything else in the CSV is skipped
+used_columns = ['ID', 'First Name', 'Last Name', 'Age'] + categorical_columns + anthropometric_columns + all_metrics
+
+# Synthetic positions made up of several recorded positions
+composite_positions = {
+    'Middle Infield': ['Shortstop', 'Second Base'],
+    'Corner Infield': ['Third Base', 'First Base'],
+}
+
+# Bump whenever clean_dataset changes so stale snapshots get rebuilt
+SNAPSHOT_VERSION = 5
+
+_lock = threading.Lock()
+_loaded = {}
+_generations = itertools.count()
+
+
+# Files kept next to the source CSV
+SNAPSHOT_SUFFIX = '.snapshot.pkl'
+SESSIONS_SUFFIX = '.sessions.csv'
+
+
+def sidecar_path(csv_path, suffix):
+    """
+    Location of a derived file kept next to the source CSV, hidden and named after it.
+    """
+    directory, filename = os.path.split(os.path.abspath(csv_path))
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, f".{stem}{suffix}")
+
+
+def _remove(path):
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def replace_atomically(path, write):
+    """
+    Call `write(tmp_path)` to build a file or directory beside `path`, then swap it in.
+
+    Concurrent readers never see a partial artifact. If anything fails the
+    temporary copy is removed and the error is raised.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    _remove(tmp_path)
+    try:
+        write(tmp_path)
+        if os.path.isdir(tmp_path) and os.path.isdir(path):
+            # os.replace cannot overwrite a non-empty directory
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+
+
+def write_pickle(path, obj):
+    """
+    Atomically replace `path` with a pickle of `obj`.
+    """
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    replace_atomically(path, write)
+
+
+def csv_signature(csv_path):
+    """
+    Cheap (mtime, size) signature of the source CSV alone.
+    """
+    stat = os.stat(csv_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def source_signature(csv_path):
+    """
+    Cheap signature of the source CSV plus its sessions log, checked on every call.
+    """
+    try:
+        stat = os.stat(sidecar_path(csv_path, SESSIONS_SUFFIX))
+        sessions = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        sessions = (0, 0)
+    return csv_signature(csv_path) + sessions
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    SHA-1 of the file contents, only computed when the signature has changed.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clean_dataset(data):
+    """
+    Apply the one-off type coercions the app relies on.
+
+    Measurements are stored as float32 and repeated labels as categoricals to
+    keep the shared frame small. Age stays float64: it is a cohort key, and
+    typed-in ages such as 16.3 must compare equal to the stored ones.
+    """
+    with stage('to_numeric'):
+        # Ensure 'Age' is treated as numeric
+        data['Age'] = pd.to_numeric(data['Age'], errors='coerce').astype(np.float64)
+
+        # Ensure all metrics are numeric
+        for metric in metrics:
+            data[metric] = pd.to_numeric(data[metric], errors='coerce').fillna(0).astype(np.float32)
+        data['Horsepower'] = pd.to_numeric(data['Horsepower'], errors='coerce').astype(np.float32)
+
+        for column in anthropometric_columns:
+            if column in data:
+                data[column] = pd.to_numeric(data[column], errors='coerce').astype(np.float32)
+
+    for column in categorical_columns:
+        if column in data:
+            data[column] = data[column].astype('category')
+    return data
+
+
+def source_digest(csv_path):
+    """
+    SHA-1 over the source CSV and its sessions log.
+    """
+    digest = hashlib.sha1(file_digest(csv_path).encode())
+    if os.path.exists(sidecar_path(csv_path, SESSIONS_SUFFIX)):
+        digest.update(file_digest(sidecar_path(csv_path, SESSIONS_SUFFIX)).encode())
+    return digest.hexdigest()
+
+
+def combine_frames(frames):
+    """
+    Concatenate cleaned frames, restoring the categorical columns that concat would widen to object.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    data = pd.concat(frames, ignore_index=True)
+    for column in categorical_columns:
+        if column in data:
+            data[column] = data[column].astype('category')
+    return data
+
+
+def read_source(source):
+    """
+    Parse and clean one export (any of the CleanHPdata layouts) into the dataset's columns.
+
+    Used for both the source CSV and ingested batches, so the same row always
+    comes out identical; fully blank rows are dropped.
+    """
+    data = pd.read_csv(source, encoding='utf-8-sig', usecols=lambda column: column.strip() in used_columns, dtype={'ID': str})
+    data.columns = [column.strip() for column in data.columns]
+    data = data.dropna(how='all').reset_index(drop=True)
+    return clean_dataset(data)
+
+
+def read_sessions_from(csv_path, offset=0):
+    """
+    Session rows stored at or after byte `offset` of the log, and the offset just past the last complete row.
+
+    The log is a CSV in the source's column layout, parsed by `read_source`.
+    Only an unterminated last line counts as still being written; any other
+    problem with the log is raised, since it is the only copy of those sessions.
+    """
+    path = sidecar_path(csv_path, SESSIONS_SUFFIX)
+    try:
+        with stage('sessions_load'), open(path, 'rb') as f:
+            header = f.readline()
+            if not header.endswith(b'\n'):
+                return [], offset
+            f.seek(max(offset, len(header)))
+            rows = f.read()
+    except FileNotFoundError:
+        return [], offset
+    complete = rows.rfind(b'\n') + 1
+    if not complete:
+        return [], max(offset, len(header))
+    return [_parse_sessions(path, header + rows[:complete])], max(offset, len(header)) + complete
+
+
+def _parse_sessions(path, contents):
+    try:
+        return read_source(io.BytesIO(contents))
+    except (UnicodeDecodeError, pd.errors.ParserError, ValueError) as e:
+        raise ValueError(f"Sessions log {path} is damaged and must be repaired by hand: {e}") from e
+
+
+def iter_sessions(csv_path, chunk_rows):
+    """
+    Cleaned chunks of at most `chunk_rows` rows of the sessions log, read lazily.
+
+    Like `read_sessions_from`, an unterminated last line is left for the next read.
+    """
+    path = sidecar_path(csv_path, SESSIONS_SUFFIX)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        header = f.readline()
+        if not header.endswith(b'\n'):
+            return
+        lines = []
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            lines.append(line)
+            if len(lines) == chunk_rows:
+                yield _parse_sessions(path, header + b''.join(lines))
+                lines = []
+        if lines:
+            yield _parse_sessions(path, header + b''.join(lines))
+
+
+def read_sessions(csv_path):
+    """
+    Every cleaned session batch appended to the log, oldest first.
+    """
+    return read_sessions_from(csv_path)[0]
+
+
+def append_session(csv_path, batch):
+    """
+    Append one cleaned batch to the sessions log; earlier rows are never rewritten.
+    """
+    rows = batch.reindex(columns=used_columns).to_csv(index=False, lineterminator='\n')
+    with _lock, open(sidecar_path(csv_path, SESSIONS_SUFFIX), 'ab') as f:
+        if f.tell():
+            # The header is only written once, when the log is created
+            rows = rows.split('\n', 1)[1]
+        f.write(rows.encode('utf-8'))
+
+
+def _read_snapshot(path):
+    try:
+        with stage('snapshot_load'), open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def _write_snapshot(path, snapshot):
+    try:
+        write_pickle(path, snapshot)
+    except OSError:
+        # A read-only checkout still works, it just re-parses the CSV on startup
+        pass
+
+
+def build_snapshot(csv_path, signature=None, digest=None):
+    """
+    Parse and clean the CSV, then persist it as a binary snapshot.
+    """
+    signature = signature or csv_signature(csv_path)
+    digest = digest or file_digest(csv_path)
+    count('snapshot_rebuilds')
+    with stage('csv_load'):
+        data = read_source(csv_path)
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'signature': signature,
+        'digest': digest,
+        'data': data,
+    }
+    _write_snapshot(sidecar_path(csv_path, SNAPSHOT_SUFFIX), snapshot)
+    return snapshot
+
+
+def _load_snapshot(csv_path, signature):
+    path = sidecar_path(csv_path, SNAPSHOT_SUFFIX)
+    snapshot = _read_snapshot(path)
+    if snapshot is not None and snapshot['signature'] == signature:
+        return snapshot
+
+    # The file was touched; only rebuild if the contents actually changed
+    digest = file_digest(csv_path)
+    if snapshot is not None and snapshot['digest'] == digest:
+        snapshot['signature'] = signature
+        _write_snapshot(path, snapshot)
+        return snapshot
+    return build_snapshot(csv_path, signature, digest)
+
+
+def load_dataset(csv_path=DEFAULT_CSV):
+    """
+    Return the cleaned dataset, shared by every caller in the process.
+
+    The frame is the CSV snapshot followed by every ingested session batch and
+    must be treated as read-only; filter or copy it before modifying anything.
+    """
+    return load_dataset_state(csv_path)['data']
+
+
+def load_dataset_state(csv_path=DEFAULT_CSV):
+    """
+    The shared dataset with its bookkeeping: `signature`, the sessions-log `offset` it
+    has read up to, and a `generation` that changes whenever it is rebuilt from scratch.
+
+    A change of the CSV rebuilds the frame; batches appended to the sessions
+    log since the last call are read from the stored offset and added to the end.
+    """
+    key = os.path.abspath(csv_path)
+    signature = source_signature(key)
+    cached = _loaded.get(key)
+    if cached is not None and cached['signature'] == signature:
+        return cached
+
+    with _lock:
+        cached = _loaded.get(key)
+        if cached is not None and cached['signature'] == signature:
+            return cached
+        if cached is not None and cached['signature'][:2] == signature[:2] and signature[3] >= cached['offset']:
+            # Only the sessions log grew
+            batches, offset = read_sessions_from(key, cached['offset'])
+            data = combine_frames([cached['data']] + batches)
+            generation = cached['generation']
+        else:
+            snapshot = _load_snapshot(key, csv_signature(key))
+            batches, offset = read_sessions_from(key)
+            data = combine_frames([snapshot['data']] + batches)
+            generation = next(_generations)
+        cached = _loaded[key] = {'signature': signature, 'offset': offset, 'generation': generation, 'data': data}
+    return cached
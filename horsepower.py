@@ -1,226 +1,394 @@
+import os
 
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import quantile_transform
-from scipy.spatial.distance import euclidean
-import matplotlib.pyplot as plt
-from io import BytesIO
-from scipy.stats import gaussian_kde
-
-# Load data
-data = pd.read_csv('CleanHPdata4.csv')
-
-# Ensure 'Age' is treated as numeric
-data['Age'] = pd.to_numeric(data['Age'], errors='coerce')
-
-# Metrics to compare
-metrics = ['Grip Strength (Bottom Hand)', 'Grip Strength (Top Hand)', 'Vertical Jump', 'Med Ball SitUp', 'Med Ball Chest']
-all_metrics = metrics + ['Horsepower']
-
-# Ensure all metrics are numeric
-for metric in metrics:
-    data[metric] = pd.to_numeric(data[metric], errors='coerce').fillna(0)
-
-# Define levels and positions
-levels = ['High School', 'College', 'Minors', 'MLB']
-positions = sorted(data['Position'].dropna().unique()) + ['Middle Infield', 'Corner Infield']
-
-# Function to preprocess data
-def preprocess_data(data, categories):
-    """
-    Ensure relevant columns are numeric and drop rows with missing values in these columns.
-    """
-    for col in categories:
-        data[col] = pd.to_numeric(data[col], errors='coerce')
-    return data.dropna(subset=categories)
-
-def plot_radar_fixed_mean(input_data, std_devs, categories, player_name, note=""):
-    num_vars = len(categories)
-    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-
-    # Complete the circle for radar chart
-    input_data = np.concatenate((input_data, [input_data[0]]))
-    mean_data = np.concatenate(([1] * num_vars, [1]))  # Fixed mean value for all metrics
-    std_devs = np.concatenate((std_devs, [std_devs[0]]))
-    angles += angles[:1]
-
-    # Start the plot
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-
-    # Shaded area for standard deviation
-    lower_bound = np.clip(mean_data - std_devs, 0, None)  # Ensure lower bound is not negative
-    upper_bound = mean_data + std_devs
-    ax.fill_between(angles, lower_bound, upper_bound, color='grey', alpha=0.3, label="± 1 Std Dev")
-
-    # Average line
-    ax.plot(angles, mean_data, color='black', linewidth=2, linestyle='solid', label="Group Average")
-
-    # Input data line
-    ax.plot(angles, input_data, color='lightcoral', linewidth=2, linestyle='solid', label=f"{player_name}'s Data")
-    ax.fill(angles, input_data, color='lightcoral', alpha=0.25)
-
-    # Customize axes
-    ax.set_yticklabels([])
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(categories, color='black')
-
-    ax.yaxis.set_ticks(np.linspace(0, 1.5, 6))
+
+from dataset import DEFAULT_CSV, all_metrics, anthropometric_columns, levels, metrics, source_signature
+from batch import read_roster, score_roster
+from names import normalize_name
+from scoring import input_vector, load_engine
+from streaming import STREAMING_ENV_VAR, load_streaming_engine
+import profiling
+from plots import compute_density_grid, plot_ladder_heatmap, plot_metric_distributions, plot_metric_panel, plot_radar, plot_radar_fixed_mean
+from chart_specs import ladder_heatmap_spec, metric_distributions_spec, metric_panel_spec, radar_chart_spec, radar_fixed_mean_spec
+from results_cache import images, input_key, results
+
+# Score against cohort sketches instead of the full dataset (see streaming.py)
+streaming = bool(os.environ.get(STREAMING_ENV_VAR))
+
+def get_engine():
+    return load_streaming_engine(DEFAULT_CSV) if streaming else load_engine(DEFAULT_CSV)
+
+@st.cache_resource(max_entries=256)
+def get_density_grid(signature, group_by, group_value, metric):
+    # Density curves depend only on the cohort, never on the player being compared
+    return compute_density_grid(get_engine().cohort_values(group_by, group_value, metric))
+
+# Per-rerun stage timings, shown in the sidebar and/or appended to a JSON-lines log
+show_profiler = st.sidebar.checkbox("Show profiler")
+if show_profiler or os.environ.get(profiling.LOG_ENV_VAR):
+    profiling.start_run('streamlit')
+
+def show_profile():
+    run = profiling.finish_run()
+    if show_profiler and run is not None:
+        with st.sidebar.expander("Profiler", expanded=True):
+            st.table(pd.DataFrame(profiling.summary_rows(run)))
+            if run.counters:
+                st.json(run.counters)
+
+# Charts drawn in the browser from compact Vega-Lite specs, or rasterized here with matplotlib
+chart_backend = st.sidebar.radio("Charts", ["Interactive", "Image"], help="Image renders PNGs on the server, as used for exports.")
+
+def show_radar(input_percentiles, comparison_percentiles, player_name, comparison_label):
+    if chart_backend == "Interactive":
+        st.vega_lite_chart(spec=radar_chart_spec(input_percentiles, comparison_percentiles, all_metrics, player_name, comparison_label), use_container_width=True)
+    else:
+        st.image(cached_image(
+            'radar_png', input_key(input_percentiles), input_key(comparison_percentiles), player_name, comparison_label,
+            compute=lambda: plot_radar(input_percentiles, comparison_percentiles, all_metrics, player_name, comparison_label).getvalue(),
+        ))
+
+def show_radar_fixed_mean(input_normalized, std_devs, categories, player_name, note):
+    if chart_backend == "Interactive":
+        st.vega_lite_chart(spec=radar_fixed_mean_spec(input_normalized, std_devs, categories, player_name, note), use_container_width=True)
+    else:
+        st.image(cached_image(
+            'radar_fixed_mean_png', input_key(input_normalized), input_key(std_devs), player_name, note,
+            compute=lambda: plot_radar_fixed_mean(input_normalized, std_devs, categories, player_name, note).getvalue(),
+        ))
+
+def show_metric_panel(player_percentiles, player_values):
+    if chart_backend == "Interactive":
+        st.vega_lite_chart(spec=metric_panel_spec(all_metrics, player_percentiles, player_values), use_container_width=True)
+    else:
+        st.image(plot_metric_panel(all_metrics, player_percentiles, player_values), use_column_width=True)
+
+def show_metric_distributions(input_metrics, density_grids, categories, player_name, cohort):
+    if chart_backend == "Interactive":
+        st.vega_lite_chart(spec=metric_distributions_spec(input_metrics, density_grids, categories, player_name), use_container_width=True)
+    else:
+        st.image(cached_image(
+            'distributions_png', cohort, input_key(input_metrics.values()), player_name,
+            compute=lambda: plot_metric_distributions(input_metrics, density_grids, categories, player_name).getvalue(),
+        ), use_column_width=True)
+
+def show_ladder(ladder, player_name):
+    cohorts, percentiles = ladder['cohorts'], ladder['percentiles']
+    if chart_backend == "Interactive":
+        st.vega_lite_chart(spec=ladder_heatmap_spec(percentiles, cohorts, all_metrics, player_name), use_container_width=True)
+    else:
+        divider = sum(group_by == 'Level' for group_by, _ in cohorts)
+        st.image(cached_image(
+            'ladder_png', input_key(percentiles.ravel()), tuple(cohorts), player_name,
+            compute=lambda: plot_ladder_heatmap(percentiles, [str(value) for _, value in cohorts], all_metrics, player_name, divider).getvalue(),
+        ))
+
+# Load data and indexes (built once per change of the CSV and shared across sessions)
+engine = get_engine()
+data = None if streaming else engine.data
+signature = source_signature(DEFAULT_CSV)
+
+def cached(*key, compute):
+    # Results depend on the data version and the player's numbers, never on their name
+    return results.get((signature, streaming) + key, compute)
+
+def cached_image(*key, compute):
+    # Rendered PNGs go in their own cache, bounded by bytes rather than entries
+    return images.get((signature, streaming) + key, compute)
+
+# Define positions
+positions = engine.positions
+
+def render_level_percentiles(player_name, input_metrics, input_data):
+    st.header("Compare to Level (Percentiles)")
+
+    # Select Group By options
+    group_by = st.selectbox("Group By", ['Level', 'Age'])
+
+    if group_by == 'Level':
+        group_value = st.selectbox("Select Level ", levels)
+    else:
+        group_value = st.text_input(f"Select {group_by}")
+
+    # Convert group_value to numeric if comparing by Age
+    if group_by == 'Age':
+        group_value = pd.to_numeric(group_value, errors='coerce')
+
+    if group_value:  # Auto-generate graphs when user inputs the data
+        comparison = cached(
+            'level_comparison', input_key(input_data), group_by, group_value,
+            compute=lambda: engine.level_comparison(input_data, group_by, group_value),
+        )
+
+        if comparison is not None:
+            input_data_percentiles = comparison['input_percentiles']
+            comparison_data = comparison['comparison_percentiles']
+            comparison_label = comparison['label']
+
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                show_radar(input_data_percentiles, comparison_data, player_name, comparison_label)
+            with col2:
+                show_metric_panel(input_data_percentiles * 100, input_data)
+        else:
+            st.error("No data found for the specified group.")
+    else:
+         st.warning("Please fill out all the input fields to generate graphs.")
+
+def render_level_mean_std(player_name, input_metrics, input_data):
+    st.header("Compare to Level (Mean/StD)")
+
+    # Select Group By options
+    group_by = st.selectbox("Group By", ['Level', 'Age'], key="group_by_selectbox")
+
+    if group_by == 'Level':
+        group_value = st.selectbox("Select Level", levels, key="level_selectbox")
+    else:
+        group_value = st.text_input(f"Select {group_by}", key="age_inputbox")
+
+    # Convert group_value to numeric if comparing by Age
+    if group_by == 'Age':
+        group_value = pd.to_numeric(group_value, errors='coerce')
+
+    if group_value:  # Auto-generate graphs when user inputs the data
+        comparison = cached(
+            'mean_std_comparison', input_key(input_metrics.values()), group_by, group_value,
+            compute=lambda: engine.mean_std_comparison(input_metrics, group_by, group_value),
+        )
+
+        if comparison is not None:
+            categories = list(input_metrics.keys())
+
+            # Display the radar chart and metric distributions
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                show_radar_fixed_mean(
+                    comparison['input_normalized'],
+                    comparison['std_devs'],
+                    categories,
+                    player_name,
+                    f"Comparison to {group_value} group (values as percentages of the mean).",
+                )
+            with col2:
+                # Plot and display metric distributions
+                density_grids = {metric: get_density_grid(signature, group_by, group_value, metric) for metric in categories}
+                show_metric_distributions(input_metrics, density_grids, categories, player_name, (group_by, group_value))
+        else:
+            st.error("No data found for the specified group.")
+    else:
+        st.warning("Please fill out all the input fields to generate graphs.")
+
+def player_label(row):
+    player = data.iloc[row]
+    details = ', '.join(str(value) for value in (player['Level'], player['Position']) if pd.notna(value))
+    return f"{player['First Name']} {player['Last Name']} ({details})"
+
+def render_player_comparison(player_name, input_metrics, input_data):
+    st.header("Compare to Player")
+
+    # Autocomplete against the name index instead of requiring an exact match
+    search = st.text_input("Search Player", placeholder="First or last name")
+    matches = cached('name_search', normalize_name(search), compute=lambda: engine.names.search(search)) if search else []
+    candidates = [row for _, rows in matches for row in rows]
+    compare_row = st.selectbox("Select Player", candidates, format_func=player_label) if candidates else None
+
+    # Ensure a player is selected and all inputs are provided before proceeding
+    if compare_row is not None and all(input_metrics.values()):
+        compare_player = data.iloc[compare_row]
+        compare_name = f"{compare_player['First Name']} {compare_player['Last Name']}"
+        comparison = cached(
+            'compare_to_row', input_key(input_data), compare_row,
+            compute=lambda: engine.compare_to_row(input_data, compare_player),
+        )
+
+        if comparison is not None:
+            input_data_percentiles = comparison['input_percentiles']
+            compare_player_percentiles = comparison['comparison_percentiles']
+
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                show_radar(input_data_percentiles, compare_player_percentiles, player_name, f"{compare_name}'s Data")
+            with col2:
+                show_metric_panel(input_data_percentiles * 100, input_data)
+        else:
+            st.error("No data found for the specified level.")
+    elif search and not candidates:
+        st.error("No player found with the specified name.")
+    else:
+        st.warning("Please fill in all required player inputs and the player name.")
+
+def render_closest_match(player_name, input_metrics, input_data):
+    st.header("Find Closest Match")
+    
+    # Ensure that all inputs are provided before proceeding
+    if all(input_metrics.values()):
+        # Optional search settings
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            num_matches = st.number_input("Number of Matches", min_value=1, max_value=25, value=1, step=1)
+        with col2:
+            match_level = st.selectbox("Restrict to Level", ['Any'] + levels, key="match_level_selectbox")
+        with col3:
+            match_position = st.selectbox("Restrict to Position", ['Any'] + positions, key="match_position_selectbox")
+
+        include_body = st.checkbox("Also match on body measurements")
+        body_values = None
+        if include_body:
+            body_values = []
+            body_cols = st.columns(3)
+            for i, column in enumerate(anthropometric_columns):
+                with body_cols[i % 3]:
+                    value = st.number_input(column, min_value=0.0, key=f"body_{column}")
+                # Measurements left at 0 are treated as missing
+                body_values.append(value if value else np.nan)
+
+        # Find the closest matches on standardized metrics
+        matches = cached(
+            'closest_matches', input_key(input_data), int(num_matches), match_level, match_position,
+            None if body_values is None else input_key(body_values),
+            compute=lambda: engine.closest_matches(
+                input_data,
+                k=int(num_matches),
+                level=None if match_level == 'Any' else match_level,
+                position=None if match_position == 'Any' else match_position,
+                body_values=body_values,
+            ),
+        )
+
+        if matches.empty:
+            st.error("No players found for the selected level and position.")
+        else:
+            closest_match = data.loc[matches.index[0]]
+
+            # Percentiles within the level of the closest match
+            comparison = cached(
+                'compare_to_row', input_key(input_data), data.index.get_loc(closest_match.name),
+                compute=lambda: engine.compare_to_row(input_data, closest_match),
+            )
+            input_data_percentiles = comparison['input_percentiles']
+            closest_match_percentiles = comparison['comparison_percentiles']
+
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                show_radar(input_data_percentiles, closest_match_percentiles, player_name, f"Closest Match: {closest_match['First Name']} {closest_match['Last Name']}")
+            with col2:
+                show_metric_panel(input_data_percentiles * 100, input_data)
+
+            st.dataframe(matches, hide_index=True)
+    else:
+        st.warning("Please fill in all required player inputs.")
+
+def render_position_comparison(player_name, input_metrics, input_data):
+    st.header("Compare to Position")
     
-    plt.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
-
-    if note:
-        plt.figtext(0.5, 0.02, note, ha="center", fontsize=8, color="grey")
-
-    # Save the plot to a BytesIO object
-    buf = BytesIO()
-    plt.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    plt.close()
-
-    # Return the BytesIO object for Streamlit
-    return buf
-
-# Function to generate metric distribution plots
-def plot_metric_distributions(input_metrics, level_data, categories, player_name):
-    """
-    Plots individual input data points on the distribution curves (PDFs) of the selected level's metrics,
-    with standard deviation bands shaded and a vertical line marking the player's value.
-    """
-    num_metrics = len(categories)
-    fig, axes = plt.subplots(nrows=num_metrics, ncols=1, figsize=(6, num_metrics * 3))  # Reduced width for side alignment
-
-    for i, metric in enumerate(categories):
-        ax = axes[i] if num_metrics > 1 else axes
-
-        # Calculate the KDE for the metric
-        metric_data = level_data[metric].dropna()
-        kde = gaussian_kde(metric_data)
-
-        # Set a wider x-axis range
-        x_min = metric_data.min() - 3 * metric_data.std()  # Extend range by 3 standard deviations below
-        x_max = metric_data.max() + 3 * metric_data.std()  # Extend range by 3 standard deviations above
-        x_vals = np.linspace(x_min, x_max, 500)
-        y_vals = kde(x_vals)
-
-        # Plot the KDE curve
-        ax.plot(x_vals, y_vals, color='royalblue', label=f"{metric} Distribution", alpha=0.7)
-        ax.fill_between(x_vals, y_vals, color='royalblue', alpha=0.3)
-
-        # Calculate mean and standard deviation
-        mean = metric_data.mean()
-        std = metric_data.std()
-
-        # Shade the one standard deviation region
-        std_x_vals = np.linspace(mean - std, mean + std, 500)
-        std_y_vals = kde(std_x_vals)
-        ax.fill_between(std_x_vals, 0, std_y_vals, color='cornflowerblue', alpha=0.4, label="±1 Std Dev")
-
-        # Plot the vertical line stopping at the intersection point for input value
-        input_value = input_metrics[metric]
-        if x_min <= input_value <= x_max:
-            input_y = float(kde(input_value))  # Ensure input_y is a scalar value
-            ax.plot([input_value, input_value], [0, input_y], color='lightcoral', linestyle='-', linewidth=2, label=f"{player_name}'s Value")
-            ax.scatter([input_value], [input_y], color='coral', s=50)  # Mark the point of intersection with a dot
-
-        # Title and labels
-        ax.set_title(f"{metric} Distribution", fontsize=12)
-        ax.set_xlim(x_min, x_max)  # Explicitly set x-axis limits to show the full distribution
-        ax.set_yticks([])  # Hide y-axis ticks for cleaner appearance
-
-
-    plt.tight_layout()
-
-    # Save the figure to BytesIO for Streamlit
-    buf = BytesIO()
-    plt.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    plt.close()
-    return buf
-
-def get_percentiles_within_group(data, columns):
-    percentiles = pd.DataFrame(index=data.index)
-    for column in columns:
-        numeric_data = pd.to_numeric(data[column], errors='coerce').fillna(0)
-        percentiles[column] = quantile_transform(numeric_data.values.reshape(-1, 1), output_distribution='uniform').flatten()
-    return percentiles
-
-def plot_radar(input_data, comparison_data, categories, player_name, comparison_label, note=""):
-    num_vars = len(categories)
-    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-
-    input_data = np.concatenate((input_data, [input_data[0]]))
-    comparison_data = np.concatenate((comparison_data, [comparison_data[0]]))
-    angles += angles[:1]
-
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-    ax.fill(angles, input_data, color='lightcoral', alpha=0.25, label=f"{player_name}'s Data" if player_name else 'Input Data')
-    ax.fill(angles, comparison_data, color='cornflowerblue', alpha=0.25, label=comparison_label)
-    ax.plot(angles, input_data, color='lightcoral', linewidth=2, linestyle='solid')
-    ax.plot(angles, comparison_data, color='cornflowerblue', linewidth=2, linestyle='solid')
-
-    ax.set_yticklabels([])
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(categories, color='black')
-
-    ax.yaxis.set_ticks(np.linspace(0, 1, 6))
-    ax.yaxis.set_ticklabels(['0', '20', '40', '60', '80', '100'], color='grey')
-
-    plt.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+    # Select Level and Position
+    level = st.selectbox("Select Level", levels)
+    position = st.selectbox("Select Position", positions)
     
-    if note:
-        plt.figtext(0.5, 0.02, note, ha="center", fontsize=8, color="grey")
-
-    # Use BytesIO to pass the image to Streamlit
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    plt.close()
-    return buf
-
-def plot_metric(metric, player_percentile, player_value):
-    color = plt.cm.coolwarm(player_percentile / 100)
-    fig, ax = plt.subplots(figsize=(6, 1))  # Adjusted width and height
-    ax.barh(' ', player_percentile, color=color, edgecolor='black')
-    ax.text(110, 0, f"{player_value:.2f}", va='center', ha='left', color='black', fontsize=8)  # Player value
-    ax.text(player_percentile - 6, 0, f"{round(player_percentile)}", va='center', ha='left', color='white', fontsize=8)  # Rounded percentile value at the right end
-    ax.set_xlim(0, 100)
-    ax.set_title(metric, fontsize=10, color='black')
-    ax.spines['top'].set_visible(True)
-    ax.spines['bottom'].set_visible(True)
-    ax.spines['left'].set_visible(True)
-    ax.spines['right'].set_visible(True)
-    ax.yaxis.set_visible(False)
-    ax.xaxis.set_visible(False)
-
-    # Use BytesIO to pass the image to Streamlit
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    plt.close()
-    return buf
+    # Ensure that level, position, and all inputs are provided before proceeding
+    if level and position and all(input_metrics.values()):
+        comparison = cached(
+            'position_comparison', input_key(input_data), level, position,
+            compute=lambda: engine.position_comparison(input_data, level, position),
+        )
+
+        if comparison is not None:
+            input_data_percentiles = comparison['input_percentiles']
+            position_percentiles = comparison['comparison_percentiles']
+
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                show_radar(input_data_percentiles, position_percentiles, player_name, comparison['label'])
+            with col2:
+                show_metric_panel(input_data_percentiles * 100, input_data)
+        else:
+            st.error("No data found for the selected position and level.")
+    else:
+        st.warning("Please fill in all required player inputs.")
+
+def render_level_ladder(player_name, input_metrics, input_data):
+    st.header("Level Ladder")
+    st.write("Where the player's numbers would rank at every level and every position, all computed in one batched lookup.")
+
+    ladder = cached('level_ladder', input_key(input_data), compute=lambda: engine.level_ladder(input_data))
+    if ladder['cohorts']:
+        show_ladder(ladder, player_name)
+    else:
+        st.error("No level or position data available.")
+
+# Comparison modes, rendered one at a time
+comparison_modes = {
+    "Compare to Level (Percentiles)": render_level_percentiles,
+    "Compare to Level (Mean/StD)": render_level_mean_std,
+    "Compare to Player": render_player_comparison,
+    "Find Closest Match": render_closest_match,
+    "Compare to Position": render_position_comparison,
+    "Level Ladder": render_level_ladder,
+}
+
+if streaming:
+    # Sketches keep cohort summaries only, so row-level modes are unavailable
+    del comparison_modes["Compare to Player"]
+    del comparison_modes["Find Closest Match"]
+    st.sidebar.info(f"Streaming mode: percentiles are approximate (each within ±{engine.rank_error * 100:.1f} points at 99% confidence).")
+
+# Choose between scoring one player and a whole roster
+mode = "Single Player" if streaming else st.sidebar.radio("Mode", ["Single Player", "Batch Roster"])
+
+if mode == "Batch Roster":
+    st.header("Batch Roster Scoring")
+    st.write(f"Upload a CSV with one row per player and the columns: {', '.join(metrics)}. "
+             "First Name, Last Name, Age, Level and Position are optional and carried through to the results.")
+
+    roster_file = st.file_uploader("Roster CSV", type="csv")
+    compare_to = st.selectbox("Compare Against", ["Each Player's Level"] + levels)
+
+    if roster_file is not None:
+        try:
+            roster = read_roster(roster_file)
+            roster_results = score_roster(
+                roster,
+                data,
+                engine.percentile_index,
+                engine.match_index(),
+                group_by='Level',
+                group_value=None if compare_to == "Each Player's Level" else compare_to,
+            )
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.dataframe(roster_results, hide_index=True)
+            st.download_button("Download Results", roster_results.to_csv(index=False).encode('utf-8'), file_name="roster_scores.csv", mime="text/csv")
+    show_profile()
+    st.stop()
 
 # Input Player Data
 st.header("Input Player Information")
 
-# First row: Player Name
-player_name = st.text_input("Player Name")
-
-# Second row: Grip Strength inputs
-col1, col2 = st.columns(2)
-with col1:
-    grip_strength_bottom = st.number_input("Grip Strength (Bottom Hand)", min_value=0.0)
-with col2:
-    grip_strength_top = st.number_input("Grip Strength (Top Hand)", min_value=0.0)
-
-# Third row: Vertical Jump, Med Ball Situp, Med Ball Chest
-col3, col4, col5 = st.columns(3)
-with col3:
-    vertical_jump = st.number_input("Vertical Jump", min_value=0.0)
-with col4:
-    med_ball_situp = st.number_input("Med Ball SitUp", min_value=0.0)
-with col5:
-    med_ball_chest = st.number_input("Med Ball Chest", min_value=0.0)
+# Edits are applied together on submit instead of rerunning the app on every keystroke
+with st.form("player_inputs"):
+    # First row: Player Name
+    player_name = st.text_input("Player Name")
+
+    # Second row: Grip Strength inputs
+    col1, col2 = st.columns(2)
+    with col1:
+        grip_strength_bottom = st.number_input("Grip Strength (Bottom Hand)", min_value=0.0)
+    with col2:
+        grip_strength_top = st.number_input("Grip Strength (Top Hand)", min_value=0.0)
+
+    # Third row: Vertical Jump, Med Ball Situp, Med Ball Chest
+    col3, col4, col5 = st.columns(3)
+    with col3:
+        vertical_jump = st.number_input("Vertical Jump", min_value=0.0)
+    with col4:
+        med_ball_situp = st.number_input("Med Ball SitUp", min_value=0.0)
+    with col5:
+        med_ball_chest = st.number_input("Med Ball Chest", min_value=0.0)
+
+    st.form_submit_button("Update")
 
 # Create a dictionary of input metrics
 input_metrics = {
@@ -235,255 +403,10 @@ input_metrics = {
 if all([player_name, grip_strength_bottom, grip_strength_top, vertical_jump, med_ball_situp, med_ball_chest]):
     
     # Calculate Horsepower for input data
-    horsepower = vertical_jump + med_ball_situp + med_ball_chest
-    input_data = list(input_metrics.values()) + [horsepower]
-
-    # Create tabs for different comparison modes
-    tabs = st.tabs(["Compare to Level (Percentiles)", "Compare to Level (Mean/StD)", "Compare to Player", "Find Closest Match", "Compare to Position"])
-
-    # 1. Compare to Level
-    with tabs[0]:
-        st.header("Compare to Level (Percentiles)")
+    input_data = input_vector(input_metrics)
 
-        # Select Group By options
-        group_by = st.selectbox("Group By", ['Level', 'Age'])
+    # Only the selected comparison mode is computed and rendered on each rerun
+    comparison_mode = st.radio("Comparison Mode", list(comparison_modes), horizontal=True)
+    comparison_modes[comparison_mode](player_name, input_metrics, input_data)
 
-        if group_by == 'Level':
-            group_value = st.selectbox("Select Level ", levels)
-        else:
-            group_value = st.text_input(f"Select {group_by}")
-
-        # Convert group_value to numeric if comparing by Age
-        if group_by == 'Age':
-            group_value = pd.to_numeric(group_value, errors='coerce')
-
-        if group_value:  # Auto-generate graphs when user inputs the data
-            comparison_group = data[data[group_by] == group_value]
-
-            if not comparison_group.empty:
-                group_percentiles = get_percentiles_within_group(comparison_group, all_metrics)
-
-                input_data_percentiles = []
-                for i, metric in enumerate(all_metrics):
-                    metric_values = pd.to_numeric(comparison_group[metric], errors='coerce').fillna(0)
-                    percentile_value = np.sum(metric_values < input_data[i]) / len(metric_values)
-                    input_data_percentiles.append(percentile_value)
-
-                comparison_data = group_percentiles.mean().values
-                comparison_label = f"{group_value} {group_by} Average"
-
-                radar_img = plot_radar(input_data_percentiles, comparison_data, all_metrics, player_name, comparison_label)
-
-                col1, col2 = st.columns([2, 1])
-                with col1:
-                    st.image(radar_img)
-                with col2:
-                    for i, metric in enumerate(all_metrics):
-                        bar_img = plot_metric(metric, input_data_percentiles[i] * 100, input_data[i])
-                        st.image(bar_img, use_column_width=True)
-            else:
-                st.error("No data found for the specified group.")
-        else:
-             st.warning("Please fill out all the input fields to generate graphs.")
-
-    with tabs[1]:
-        st.header("Compare to Level (Mean/StD)")
-    
-        # Select Group By options
-        group_by = st.selectbox("Group By", ['Level', 'Age'], key="group_by_selectbox")
-    
-        if group_by == 'Level':
-            group_value = st.selectbox("Select Level", levels, key="level_selectbox")
-        else:
-            group_value = st.text_input(f"Select {group_by}", key="age_inputbox")
-    
-        # Convert group_value to numeric if comparing by Age
-        if group_by == 'Age':
-            group_value = pd.to_numeric(group_value, errors='coerce')
-    
-        if group_value:  # Auto-generate graphs when user inputs the data
-            # Filter the dataset
-            comparison_group = data[data[group_by] == group_value]
-    
-            if not comparison_group.empty:
-                # Preprocess data to ensure numeric values
-                categories = list(input_metrics.keys())
-                comparison_group = preprocess_data(comparison_group, categories)
-    
-                # Calculate averages and standard deviations for the selected group
-                average_values = comparison_group[categories].mean().values
-                std_devs = comparison_group[categories].std().values / average_values  # Std dev as a percentage of the mean
-    
-                # Normalize input data as a percentage of the mean
-                input_data_normalized = [val / avg for val, avg in zip(input_metrics.values(), average_values)]
-    
-                # Plot the radar chart
-                radar_img = plot_radar_fixed_mean(
-                    input_data=input_data_normalized,
-                    std_devs=std_devs,
-                    categories=categories,
-                    player_name=player_name,
-                    note=f"Comparison to {group_value} group (values as percentages of the mean)."
-                )
-    
-                # Display the radar chart and metric distributions
-                col1, col2 = st.columns([2, 1])
-                with col1:
-                    st.image(radar_img)
-                with col2:
-                    # Plot and display metric distributions
-                    distribution_img = plot_metric_distributions(input_metrics, comparison_group, categories, player_name)
-                    st.image(distribution_img, use_column_width=True)
-            else:
-                st.error("No data found for the specified group.")
-        else:
-            st.warning("Please fill out all the input fields to generate graphs.")
-    
-    with tabs[2]:
-        st.header("Compare to Player")
-    
-        first_name = st.text_input("First Name")
-        last_name = st.text_input("Last Name")
-        
-        # Ensure both player names and all inputs are provided before proceeding
-        if first_name and last_name and all([grip_strength_bottom, grip_strength_top, vertical_jump, med_ball_situp, med_ball_chest]):
-            compare_player = data[(data['First Name'] == first_name) & (data['Last Name'] == last_name)]
-    
-            if compare_player.empty:
-                st.error("No player found with the specified name.")
-            else:
-                compare_player = compare_player.iloc[0]
-                level = compare_player['Level']
-                comparison_group = data[data['Level'] == level]
-    
-                if not comparison_group.empty:
-                    group_percentiles = get_percentiles_within_group(comparison_group, all_metrics)
-    
-                    input_data_percentiles = []
-                    for i, metric in enumerate(all_metrics):
-                        metric_values = pd.to_numeric(comparison_group[metric], errors='coerce').fillna(0)
-                        percentile_value = np.sum(metric_values < input_data[i]) / len(metric_values)
-                        input_data_percentiles.append(percentile_value)
-    
-                    compare_player_percentiles = []
-                    for i, metric in enumerate(all_metrics):
-                        metric_values = pd.to_numeric(comparison_group[metric], errors='coerce').fillna(0)
-                        percentile_value = np.sum(metric_values < compare_player[metric]) / len(metric_values)
-                        compare_player_percentiles.append(percentile_value)
-    
-                    radar_img = plot_radar(input_data_percentiles, compare_player_percentiles, all_metrics, player_name, f"{first_name} {last_name}'s Data")
-    
-                    col1, col2 = st.columns([2, 1])
-                    with col1:
-                        st.image(radar_img)
-                    with col2:
-                        for i, metric in enumerate(all_metrics):
-                            bar_img = plot_metric(metric, input_data_percentiles[i] * 100, input_data[i])
-                            st.image(bar_img, use_column_width=True)
-                else:
-                    st.error("No data found for the specified level.")
-        else:
-            st.warning("Please fill in all required player inputs and the player name.")
-    
-    with tabs[3]:
-        st.header("Find Closest Match")
-        
-        # Ensure that all inputs are provided before proceeding
-        if all([grip_strength_bottom, grip_strength_top, vertical_jump, med_ball_situp, med_ball_chest]):
-            # Collect input data
-            input_data = [grip_strength_bottom, grip_strength_top, vertical_jump, med_ball_situp, med_ball_chest]
-    
-            # Calculate 'Horsepower'
-            horsepower = vertical_jump + med_ball_situp + med_ball_chest
-            input_data.append(horsepower)
-    
-            # Find the closest match in the dataset using Euclidean distance
-            data_subset = data[all_metrics].dropna()
-            distances = data_subset.apply(lambda row: euclidean(input_data, row), axis=1)
-            closest_index = distances.idxmin()
-            closest_match = data.loc[closest_index]
-    
-            # Get the level of the closest match
-            level = closest_match['Level']
-            comparison_group = data[data['Level'] == level]
-    
-            group_percentiles = get_percentiles_within_group(comparison_group, all_metrics)
-    
-            input_data_percentiles = []
-            for i, metric in enumerate(all_metrics):
-                metric_values = pd.to_numeric(comparison_group[metric], errors='coerce').fillna(0)
-                percentile_value = np.sum(metric_values < input_data[i]) / len(metric_values)
-                input_data_percentiles.append(percentile_value)
-    
-            closest_match_percentiles = []
-            for i, metric in enumerate(all_metrics):
-                metric_values = pd.to_numeric(comparison_group[metric], errors='coerce').fillna(0)
-                percentile_value = np.sum(metric_values < closest_match[metric]) / len(metric_values)
-                closest_match_percentiles.append(percentile_value)
-    
-            radar_img = plot_radar(input_data_percentiles, closest_match_percentiles, all_metrics, player_name, f"Closest Match: {closest_match['First Name']} {closest_match['Last Name']}")
-    
-            col1, col2 = st.columns([2, 1])
-            with col1:
-                st.image(radar_img)
-            with col2:
-                for i, metric in enumerate(all_metrics):
-                    bar_img = plot_metric(metric, input_data_percentiles[i] * 100, input_data[i])
-                    st.image(bar_img, use_column_width=True)
-        else:
-            st.warning("Please fill in all required player inputs.")
-
-    with tabs[4]:
-        st.header("Compare to Position")
-        
-        # Select Level and Position
-        level = st.selectbox("Select Level", levels)
-        position = st.selectbox("Select Position", positions)
-        
-        # Ensure that level, position, and all inputs are provided before proceeding
-        if level and position and all([grip_strength_bottom, grip_strength_top, vertical_jump, med_ball_situp, med_ball_chest]):
-            # Adjust positions for custom categories
-            if position == 'Middle Infield':
-                position_data = data[data['Position'].isin(['Shortstop', 'Second Base'])]
-            elif position == 'Corner Infield':
-                position_data = data[data['Position'].isin(['Third Base', 'First Base'])]
-            else:
-                position_data = data[data['Position'] == position]
-    
-            # Filter data by level
-            level_data = data[data['Level'] == level]
-            position_data = position_data[position_data['Level'] == level]
-    
-            if not position_data.empty:
-                level_percentiles = get_percentiles_within_group(level_data, all_metrics)
-                position_avg_percentiles = position_data[all_metrics].mean()
-    
-                position_percentiles = []
-                for i, metric in enumerate(all_metrics):
-                    metric_values = pd.to_numeric(level_data[metric], errors='coerce').fillna(0)
-                    percentile_value = np.sum(metric_values < position_avg_percentiles[metric]) / len(metric_values)
-                    position_percentiles.append(percentile_value)
-    
-                input_data = [grip_strength_bottom, grip_strength_top, vertical_jump, med_ball_situp, med_ball_chest]
-                horsepower = vertical_jump + med_ball_situp + med_ball_chest
-                input_data.append(horsepower)
-    
-                input_data_percentiles = []
-                for i, metric in enumerate(all_metrics):
-                    metric_values = pd.to_numeric(level_data[metric], errors='coerce').fillna(0)
-                    percentile_value = np.sum(metric_values < input_data[i]) / len(metric_values)
-                    input_data_percentiles.append(percentile_value)
-    
-                radar_img = plot_radar(input_data_percentiles, position_percentiles, all_metrics, player_name, f"{position} Average in {level}")
-    
-                col1, col2 = st.columns([2, 1])
-                with col1:
-                    st.image(radar_img)
-                with col2:
-                    for i, metric in enumerate(all_metrics):
-                        bar_img = plot_metric(metric, input_data_percentiles[i] * 100, input_data[i])
-                        st.image(bar_img, use_column_width=True)
-            else:
-                st.error("No data found for the selected position and level.")
-        else:
-            st.warning("Please fill in all required player inputs.")
+show_profile()
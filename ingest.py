@@ -0,0 +1,163 @@
+"""
+Append new testing sessions to the dataset without rebuilding it.
+
+    python ingest.py sessions-2024-06-01.csv --csv CleanHPdata4.csv
+
+Batches may use any of the export schemas (CleanHPdata2.0 with names,
+CleanHPdata2.1 with IDs, or CleanHPdata4 with body measurements). New rows
+are appended to a CSV sessions log next to the source, and only the cohorts
+they fall into have their percentile arrays and cube cells updated.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from cohort_cube import CUBE_SUFFIX, load_cube, updated_cube, write_cube
+from dataset import (
+    DEFAULT_CSV, all_metrics, append_session, load_dataset, metrics, read_source, sidecar_path, source_digest, source_signature,
+)
+from names import normalize_name
+
+# Decimal places metric values are compared at when spotting repeated sessions
+DEDUP_DECIMALS = 2
+
+
+def read_batch(source):
+    """
+    Read one session export, normalized exactly as the source CSV is.
+    """
+    batch = read_source(source)
+
+    missing = [column for column in ['Level'] + metrics if column not in batch.columns]
+    if missing:
+        raise ValueError(f"Batch is missing the required columns: {', '.join(missing)}")
+    if 'ID' not in batch.columns and not {'First Name', 'Last Name'} <= set(batch.columns):
+        raise ValueError("Batch needs either an ID column or First Name and Last Name columns")
+    # A row without a level belongs to no cohort (the older exports carry a few stray ones)
+    return batch[batch['Level'].notna()].reset_index(drop=True)
+
+
+def athlete_identities(data):
+    """
+    (export ID, normalized full name) per row, either of which may be None.
+    """
+    if 'First Name' in data and 'Last Name' in data:
+        names = (data['First Name'].fillna('').astype(str) + ' ' + data['Last Name'].fillna('').astype(str)).map(normalize_name)
+        names = [name or None for name in names]
+    else:
+        names = [None] * len(data)
+    if 'ID' in data:
+        ids = [(athlete_id.strip() or None) if isinstance(athlete_id, str) else None for athlete_id in data['ID']]
+    else:
+        ids = [None] * len(data)
+    return list(zip(ids, names))
+
+
+def same_athlete(identity, other):
+    """
+    Whether two rows can be the same athlete: IDs decide when both rows have one,
+    then names; rows from exports that share neither (e.g. ID-only vs name-only) are not told apart.
+    """
+    (athlete_id, name), (other_id, other_name) = identity, other
+    if athlete_id and other_id:
+        return athlete_id == other_id
+    if name and other_name:
+        return name == other_name
+    return True
+
+
+def session_vectors(data):
+    """
+    (level, metric values) per row, rounded and with missing values as None so that equal sessions compare equal.
+    """
+    values = np.round(data[all_metrics].to_numpy(dtype=float), DEDUP_DECIMALS)
+    levels = data['Level'].astype(object).where(data['Level'].notna(), None).tolist()
+    return [
+        (level,) + tuple(None if np.isnan(value) else value for value in row)
+        for level, row in zip(levels, values.tolist())
+    ]
+
+
+def candidate_rows(batch, data):
+    """
+    Positions of the `data` rows that could repeat a batch session.
+
+    Only rows whose level and every rounded metric value occur somewhere in
+    the batch can, so the per-row comparison is limited to those.
+    """
+    rows = data['Level'].isin(batch['Level'].dropna().unique()).to_numpy(copy=True)
+    history = np.round(data[all_metrics].to_numpy(dtype=float), DEDUP_DECIMALS)
+    sessions = np.round(batch[all_metrics].to_numpy(dtype=float), DEDUP_DECIMALS)
+    for column in range(len(all_metrics)):
+        matches = np.isin(history[:, column], sessions[:, column])
+        if np.isnan(sessions[:, column]).any():
+            matches |= np.isnan(history[:, column])
+        rows &= matches
+    return np.flatnonzero(rows)
+
+
+def new_sessions(batch, data):
+    """
+    Rows of `batch` that are not already in `data` (or earlier in the batch).
+
+    A row repeats a session when an existing row has the same level and metric
+    values and may be the same athlete. A retest with different numbers is kept.
+    """
+    history = data.iloc[candidate_rows(batch, data)]
+    seen = {}
+    for vector, identity in zip(session_vectors(history), athlete_identities(history)):
+        seen.setdefault(vector, []).append(identity)
+
+    keep = []
+    for vector, identity in zip(session_vectors(batch), athlete_identities(batch)):
+        matches = seen.setdefault(vector, [])
+        keep.append(not any(same_athlete(identity, other) for other in matches))
+        matches.append(identity)
+    return batch[np.array(keep, dtype=bool)].reset_index(drop=True)
+
+
+def ingest(sources, csv_path=DEFAULT_CSV):
+    """
+    Append every new session in `sources` to the sessions log and update the cohort cube.
+
+    Running apps and servers fold the new batch into their engines on their
+    next request. Returns a summary dict of rows read, skipped and appended.
+    """
+    data = load_dataset(csv_path)
+    batches = [read_batch(source) for source in sources]
+    batch = pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
+    fresh = new_sessions(batch, data)
+    summary = {'read': len(batch), 'skipped': len(batch) - len(fresh), 'appended': len(fresh), 'players': len(data)}
+    if fresh.empty:
+        return summary
+
+    cube = load_cube(csv_path)
+    append_session(csv_path, fresh)
+    data = load_dataset(csv_path)
+    try:
+        cube = updated_cube(cube, fresh, source_signature(csv_path), source_digest(csv_path))
+        write_cube(sidecar_path(csv_path, CUBE_SUFFIX), cube.manifest, cube.arrays())
+    except OSError:
+        # A read-only checkout rebuilds the cube on next load instead
+        pass
+    summary['players'] = len(data)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append new testing sessions to the Horsepower dataset.")
+    parser.add_argument('batches', nargs='+', help="Session CSV exports")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="Source dataset")
+    args = parser.parse_args()
+
+    summary = ingest(args.batches, args.csv)
+    print(
+        f"Read {summary['read']} rows: appended {summary['appended']}, skipped {summary['skipped']} duplicates "
+        f"({summary['players']} players in {os.path.basename(args.csv)} and its sessions log)"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from dataset import all_metrics, composite_positions
+from profiling import timed
+
+# Rows scored per block when missing values rule out the k-d tree
+CHUNK_SIZE = 65536
+
+
+class ClosestMatchIndex:
+    """
+    Top-k nearest neighbours over standardized metric vectors.
+
+    Every indexed row must have all of `all_metrics` (as the old `dropna` did);
+    the optional extra columns may be missing. When the query or the rows have
+    gaps, distances are computed over the dimensions both sides share and
+    rescaled to the number of dimensions the query has, so sparse rows are not
+    favoured and a complete query scores as it would in the k-d tree.
+    """
+
+    @timed('match_index_build')
+    def __init__(self, data, extra_columns=()):
+        extra_columns = [column for column in extra_columns if column in data.columns]
+        self.columns = all_metrics + extra_columns
+
+        features = data[self.columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        keep = ~np.isnan(features[:, :len(all_metrics)]).any(axis=1)
+        # Positions of the indexed rows within `data`
+        self.row_ids = np.flatnonzero(keep)
+        features = features[keep]
+
+        self.mean = np.nanmean(features, axis=0) if len(features) else np.zeros(len(self.columns))
+        scale = np.nanstd(features, axis=0) if len(features) else np.ones(len(self.columns))
+        scale[~np.isfinite(scale) | (scale == 0)] = 1.0
+        self.scale = scale
+
+        self.features = (features - self.mean) / self.scale
+        self.observed = ~np.isnan(self.features)
+        self.features[~self.observed] = 0.0
+        self.complete = bool(self.observed.all())
+
+        self.levels = data['Level'].to_numpy()[keep]
+        self.positions = data['Position'].to_numpy()[keep]
+
+        self._trees = {}
+        self._lock = threading.Lock()
+
+    def _subset(self, level=None, position=None):
+        mask = np.ones(len(self.row_ids), dtype=bool)
+        if level is not None:
+            mask &= self.levels == level
+        if position is not None:
+            mask &= np.isin(self.positions, composite_positions.get(position, [position]))
+        return np.flatnonzero(mask)
+
+    def _tree(self, level, position, pattern=None):
+        # `pattern` restricts the tree to the columns a group of incomplete queries has
+        key = (level, position, pattern)
+        entry = self._trees.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._trees.get(key)
+                if entry is None:
+                    subset = self._subset(level, position)
+                    features = self.features[subset] if pattern is None else self.features[subset][:, list(pattern)]
+                    tree = cKDTree(features) if len(subset) else None
+                    entry = self._trees[key] = (subset, tree)
+        return entry
+
+    def standardize(self, values):
+        return (np.asarray(values, dtype=float) - self.mean) / self.scale
+
+    @timed('closest_match')
+    def query(self, values, k=1, level=None, position=None):
+        """
+        Return (positions in `data`, distances) of the k closest rows, nearest first.
+
+        `values` follows `self.columns`; NaN marks a measurement the player doesn't have.
+        """
+        query = self.standardize(values)
+        query_observed = ~np.isnan(query)
+
+        if self.complete and query_observed.all():
+            subset, tree = self._tree(level, position)
+            if tree is None:
+                return np.empty(0, dtype=int), np.empty(0)
+            k = min(k, len(subset))
+            distances, found = tree.query(query, k=k)
+            found = np.atleast_1d(found)
+            return self.row_ids[subset[found]], np.atleast_1d(distances)
+
+        subset = self._subset(level, position)
+        return self._masked_query(query, query_observed, subset, k)
+
+    @timed('closest_match_batch')
+    def query_many(self, values, level=None, position=None):
+        """
+        Closest row for each row of a (players x columns) array.
+
+        Returns (positions in `data`, distances); -1 and inf where nothing matched.
+        """
+        queries = self.standardize(values)
+        observed = ~np.isnan(queries)
+        complete = observed.all(axis=1)
+        rows = np.full(len(queries), -1, dtype=int)
+        distances = np.full(len(queries), np.inf)
+
+        subset, tree = self._tree(level, position)
+        if tree is None:
+            return rows, distances
+
+        # Complete rows go through the tree in a single call
+        if self.complete and complete.any():
+            found_distances, found = tree.query(queries[complete], k=1)
+            rows[complete] = self.row_ids[subset[found]]
+            distances[complete] = found_distances
+
+        # The rest: one k-d tree per missing-value pattern when every indexed
+        # row is complete (the masked distance is then the plain distance over
+        # the query's columns), otherwise one blocked masked-distance pass
+        remaining = np.flatnonzero(~complete & observed.any(axis=1)) if self.complete else np.flatnonzero(observed.any(axis=1))
+        if not len(remaining):
+            return rows, distances
+        if self.complete:
+            patterns, groups = np.unique(observed[remaining], axis=0, return_inverse=True)
+            for group, pattern in enumerate(patterns):
+                members = remaining[groups.ravel() == group]
+                columns = tuple(np.flatnonzero(pattern))
+                _, pattern_tree = self._tree(level, position, columns)
+                found_distances, found = pattern_tree.query(queries[members][:, list(columns)], k=1)
+                rows[members] = self.row_ids[subset[found]]
+                distances[members] = found_distances
+        else:
+            found, found_distances = self._masked_query_many(queries[remaining], observed[remaining], subset)
+            matched = found >= 0
+            rows[remaining[matched]] = found[matched]
+            distances[remaining[matched]] = found_distances[matched]
+        return rows, distances
+
+    def _masked_query_many(self, queries, queries_observed, subset):
+        """
+        Closest row in `subset` for each query, by the same distance as `_masked_query`.
+
+        Each query keeps its own missing-value mask. Blocks of (queries x rows)
+        distances come from three matrix products, so there is no per-query scan.
+        """
+        mask = queries_observed.astype(float)
+        queries = np.where(queries_observed, queries, 0.0)
+        total_dims = mask.sum(axis=1)
+        # Sum over the shared dims of (x - q)^2 = x^2 - 2xq + q^2, as one product
+        # of these stacked query terms with the matching row terms
+        query_terms = np.hstack((mask, -2 * queries, queries * queries))
+        best_rows = np.full(len(queries), -1, dtype=int)
+        best_scores = np.full(len(queries), np.inf)
+
+        chunk_size = max(1, CHUNK_SIZE * 16 // len(queries))
+        for start in range(0, len(subset), chunk_size):
+            rows = subset[start:start + chunk_size]
+            # Unobserved features are stored as 0, so they are already masked on the row side
+            features = self.features[rows]
+            shared = self.observed[rows].astype(float)
+            squared = query_terms @ np.hstack((features * features, features, shared)).T
+            counts = mask @ shared.T
+            # Ranked by mean squared difference; the sqrt and the query's own
+            # dimension count do not change the order, so they wait for the winners
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = np.divide(squared, counts, out=np.full(squared.shape, np.inf), where=counts > 0)
+
+            nearest = np.argmin(scores, axis=1)
+            nearest_scores = scores[np.arange(len(queries)), nearest]
+            better = nearest_scores < best_scores
+            best_rows[better] = rows[nearest[better]]
+            best_scores[better] = nearest_scores[better]
+
+        found = best_rows >= 0
+        distances = np.sqrt(np.maximum(best_scores, 0.0) * total_dims)
+        return np.where(found, self.row_ids[np.maximum(best_rows, 0)], -1), distances
+
+    def _masked_query(self, query, query_observed, subset, k):
+        query = np.where(query_observed, query, 0.0)
+        total_dims = query_observed.sum()
+        best_rows = np.empty(0, dtype=int)
+        best_distances = np.empty(0)
+
+        for start in range(0, len(subset), CHUNK_SIZE):
+            rows = subset[start:start + CHUNK_SIZE]
+            shared = self.observed[rows] & query_observed
+            diff = (self.features[rows] - query) * shared
+            counts = shared.sum(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                distances = np.sqrt((diff * diff).sum(axis=1) * total_dims / counts)
+            distances[counts == 0] = np.inf
+
+            # Keep only the running top-k between chunks
+            rows = np.concatenate((best_rows, rows))
+            distances = np.concatenate((best_distances, distances))
+            if len(distances) > k:
+                top = np.argpartition(distances, k - 1)[:k]
+                rows, distances = rows[top], distances[top]
+            best_rows, best_distances = rows, distances
+
+        order = np.argsort(best_distances, kind='stable')
+        return self.row_ids[best_rows[order]], best_distances[order]
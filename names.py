@@ -0,0 +1,132 @@
+import copy
+import difflib
+from bisect import bisect_left
+
+# Most suggestions returned for one query
+DEFAULT_LIMIT = 10
+
+# Sorted search keys on each side of the query's position that fuzzy matching compares against
+FUZZY_WINDOW = 200
+
+
+def normalize_name(name):
+    """
+    Case- and whitespace-insensitive form of a player name.
+    """
+    return ' '.join(str(name).split()).casefold()
+
+
+def _full_names(data):
+    return (data['First Name'].fillna('').astype(str) + ' ' + data['Last Name'].fillna('').astype(str)).tolist()
+
+
+def _search_pairs(key):
+    # Names are searchable as "first last" and "last first"
+    pairs = [(key, key)]
+    first, _, last = key.partition(' ')
+    if last:
+        pairs.append((f"{last} {first}", key))
+    return pairs
+
+
+class NameIndex:
+    """
+    Player-name lookups built once at load time.
+
+    Exact lookups hit a dict; prefix completion bisects sorted keys for both
+    "first last" and "last first" orderings; fuzzy suggestions only compare
+    against the `FUZZY_WINDOW` keys sorted on either side of the query, so a
+    miss costs the same however many names share its first letters.
+    """
+
+    def __init__(self, data):
+        self._rows = {}
+        self._display = {}
+        for row, full_name in enumerate(_full_names(data)):
+            key = normalize_name(full_name)
+            if not key:
+                continue
+            self._rows.setdefault(key, []).append(row)
+            self._display.setdefault(key, ' '.join(full_name.split()))
+
+        # (search key, full-name key) pairs sorted for bisecting
+        search_keys = [pair for key in self._rows for pair in _search_pairs(key)]
+        search_keys.sort()
+        self._search_keys = [search_key for search_key, _ in search_keys]
+        self._search_targets = [key for _, key in search_keys]
+
+    def with_rows(self, data, start):
+        """
+        New index that also covers `data`, whose rows sit at positions `start`, `start + 1`, ...
+
+        Only names that are new to the index are inserted into the sorted keys.
+        """
+        index = copy.copy(self)
+        index._rows = dict(self._rows)
+        index._display = dict(self._display)
+        index._search_keys = list(self._search_keys)
+        index._search_targets = list(self._search_targets)
+        for row, full_name in enumerate(_full_names(data), start):
+            key = normalize_name(full_name)
+            if not key:
+                continue
+            if key in index._rows:
+                index._rows[key] = index._rows[key] + [row]
+                continue
+            index._rows[key] = [row]
+            index._display[key] = ' '.join(full_name.split())
+            for search_key, target in _search_pairs(key):
+                i = bisect_left(index._search_keys, search_key)
+                index._search_keys.insert(i, search_key)
+                index._search_targets.insert(i, target)
+        return index
+
+    def __len__(self):
+        return len(self._rows)
+
+    def lookup(self, name):
+        """
+        Row positions of every player with exactly this name (ignoring case and spacing).
+        """
+        return self._rows.get(normalize_name(name), [])
+
+    def display_name(self, key):
+        return self._display[key]
+
+    def prefix(self, query, limit=DEFAULT_LIMIT):
+        query = normalize_name(query)
+        if not query:
+            return []
+        found = []
+        i = bisect_left(self._search_keys, query)
+        while i < len(self._search_keys) and len(found) < limit and self._search_keys[i].startswith(query):
+            key = self._search_targets[i]
+            if key not in found:
+                found.append(key)
+            i += 1
+        return found
+
+    def fuzzy(self, query, limit=DEFAULT_LIMIT, cutoff=0.6):
+        query = normalize_name(query)
+        if not query:
+            return []
+        i = bisect_left(self._search_keys, query)
+        window = slice(max(0, i - FUZZY_WINDOW), i + FUZZY_WINDOW)
+        targets = {}
+        for search_key, key in zip(self._search_keys[window], self._search_targets[window]):
+            targets.setdefault(search_key, key)
+        found = []
+        for search_key in difflib.get_close_matches(query, list(targets), n=limit * 2, cutoff=cutoff):
+            key = targets[search_key]
+            if key not in found:
+                found.append(key)
+        return found[:limit]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Candidate (display name, row positions) pairs: prefix matches first, then fuzzy ones.
+        """
+        keys = self.prefix(query, limit)
+        if len(keys) < limit:
+            keys += [key for key in self.fuzzy(query, limit) if key not in keys][:limit - len(keys)]
+        return [(self._display[key], self._rows[key]) for key in keys]
@@ -0,0 +1,202 @@
+import copy
+import numbers
+
+import numpy as np
+import pandas as pd
+
+from dataset import all_metrics, composite_positions, levels
+from profiling import timed
+
+# Columns a cohort can be selected by
+group_columns = ['Level', 'Age', 'Position']
+
+
+def cohort_key(group_by, group_value):
+    """
+    Normalize a cohort selection so that e.g. Age 20, 20.0 and np.int64(20) share one entry.
+    """
+    if isinstance(group_value, numbers.Number) and not isinstance(group_value, bool):
+        group_value = float(group_value)
+    return group_by, group_value
+
+
+def metric_matrix(data, columns):
+    """
+    Numeric (rows x metrics) float32 matrix with missing values counted as 0, as the percentile code always has.
+    """
+    return data[columns].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float32)
+
+
+def cohort_row_ids(data):
+    """
+    Integer row positions of every Level, Age and Position cohort, plus the composite positions.
+    """
+    cohorts = {}
+    for group_by in group_columns:
+        for group_value, rows in data.groupby(group_by, sort=False, observed=True).indices.items():
+            cohorts[cohort_key(group_by, group_value)] = rows
+
+    positions = data['Position']
+    for name, members in composite_positions.items():
+        rows = np.flatnonzero(positions.isin(members).to_numpy())
+        if len(rows):
+            cohorts[cohort_key('Position', name)] = rows
+    return cohorts
+
+
+def ladder_cohorts(index, positions):
+    """
+    Every non-empty Level (in ladder order) followed by every non-empty Position, as cohort keys.
+    """
+    keys = [('Level', level) for level in levels] + [('Position', position) for position in positions]
+    return [key for key in keys if index.size(*key)]
+
+
+class PercentileIndex:
+    """
+    One pre-sorted array per (cohort, metric), answering percentile queries with a binary search.
+
+    A player's percentile is the share of the cohort strictly below their value,
+    matching the previous `np.sum(metric_values < x) / len(metric_values)`.
+    Values are kept as float32, the dataset's storage type, and queries are
+    rounded to float32 too so that ties compare equal.
+    """
+
+    @timed('percentile_index_build')
+    def __init__(self, data, columns=all_metrics, cohorts=None):
+        self.columns = list(columns)
+        self._sorted = {}
+        self._ladders = {}
+        values = metric_matrix(data, self.columns)
+
+        cohorts = cohort_row_ids(data) if cohorts is None else cohorts
+        for key, rows in cohorts.items():
+            self._add(key, values[rows])
+
+    def _add(self, key, values):
+        # Store metric-major so each row is one contiguous sorted array
+        self._store(key, np.sort(values, axis=0).T)
+
+    def _store(self, key, sorted_values):
+        sorted_values = np.ascontiguousarray(sorted_values)
+        sorted_values.setflags(write=False)
+        self._sorted[key] = sorted_values
+
+    def with_values(self, additions):
+        """
+        New index with extra rows merged into the given cohorts; untouched cohorts are shared.
+
+        `additions` maps cohort keys to (rows x columns) frames of new players.
+        """
+        index = copy.copy(self)
+        index._sorted = dict(self._sorted)
+        index._ladders = {}
+        for key, frame in additions.items():
+            new_values = np.sort(metric_matrix(frame, self.columns), axis=0).T
+            old_values = self._sorted.get(key)
+            if old_values is None:
+                index._store(key, new_values)
+                continue
+            # Insert each metric's new values at their binary-search positions
+            index._store(key, np.vstack([
+                np.insert(old_values[i], np.searchsorted(old_values[i], new_values[i]), new_values[i])
+                for i in range(len(self.columns))
+            ]))
+        return index
+
+    def cohorts(self):
+        return list(self._sorted)
+
+    def sorted_values(self, group_by, group_value):
+        """
+        (metrics x n) array of the cohort's sorted values, or None if the cohort is empty.
+        """
+        return self._sorted.get(cohort_key(group_by, group_value))
+
+    def size(self, group_by, group_value):
+        sorted_values = self.sorted_values(group_by, group_value)
+        return 0 if sorted_values is None else sorted_values.shape[1]
+
+    @timed('percentile_lookup')
+    def percentiles(self, group_by, group_value, values):
+        """
+        Percentiles (0-1) of `values` within the cohort.
+
+        `values` holds one value per column, or is a (players x columns) array
+        for scoring many players at once. Missing values score 0.
+        """
+        sorted_values = self.sorted_values(group_by, group_value)
+        if sorted_values is None:
+            return None
+
+        values = np.asarray(values, dtype=float)
+        queries = np.atleast_2d(values)
+        n = sorted_values.shape[1]
+        result = np.empty(queries.shape, dtype=float)
+        for i in range(len(self.columns)):
+            result[:, i] = np.searchsorted(sorted_values[i], queries[:, i].astype(sorted_values.dtype), side='left') / n
+        result[np.isnan(queries)] = 0.0
+        return result[0] if values.ndim == 1 else result
+
+    @timed('percentile_ladder')
+    def ladder(self, keys, values):
+        """
+        Percentiles of one player's `values` against many cohorts at once, as a (cohorts x columns) matrix.
+
+        Every (column, cohort) sorted array is laid end to end, each shifted into
+        its own disjoint range, so the whole matrix is a single `np.searchsorted`.
+        Rows of empty cohorts are NaN.
+        """
+        keys = tuple(cohort_key(*key) for key in keys)
+        layout = self._ladders.get(keys)
+        if layout is None:
+            layout = self._ladders[keys] = self._ladder_layout(keys)
+        flat, lows, span, starts, sizes = layout
+
+        queries = np.asarray(values, dtype=np.float32).astype(float)
+        shifted = (queries - lows)[:, None] + span * np.arange(starts.size).reshape(starts.shape)
+        below = np.searchsorted(flat, shifted.ravel(), side='left').reshape(starts.shape) - starts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.clip(below, 0, sizes) / sizes
+        result[np.isnan(queries)] = 0.0
+        result[sizes == 0] = np.nan
+        return result.T
+
+    def _ladder_layout(self, keys):
+        # One float64 array holding every (column, cohort) segment in its own [s * span, (s + 1) * span) range;
+        # span is a power of two wider than any column's spread, so the shifts are exact
+        arrays = [self._sorted.get(key) for key in keys]
+        present = [array for array in arrays if array is not None]
+        lows = np.zeros(len(self.columns))
+        span = 1.0
+        if present:
+            lows = np.min([array[:, 0] for array in present], axis=0).astype(float)
+            highs = np.max([array[:, -1] for array in present], axis=0).astype(float)
+            span = 2.0 ** np.ceil(np.log2(np.max(highs - lows) + 1))
+
+        starts = np.zeros((len(self.columns), len(keys)), dtype=np.intp)
+        sizes = np.zeros((len(self.columns), len(keys)))
+        segments = [np.empty(0)]
+        offset = 0
+        for i in range(len(self.columns)):
+            for j, array in enumerate(arrays):
+                starts[i, j] = offset
+                if array is not None:
+                    segments.append(array[i].astype(float) - lows[i] + (i * len(keys) + j) * span)
+                    sizes[i, j] = array.shape[1]
+                    offset += array.shape[1]
+        return np.concatenate(segments), lows, span, starts, sizes
+
+    def group_average(self, group_by, group_value):
+        """
+        Mean within-group percentile of every column.
+
+        `quantile_transform` maps each member to about its rank / (n - 1), and
+        those ranks average to (n - 1) / 2, so the mean is 0.5 (matches the
+        baseline to within interpolation of ties) for any group larger than
+        one. A column whose values are all equal maps to 0, as does a single member.
+        """
+        sorted_values = self.sorted_values(group_by, group_value)
+        if sorted_values is None:
+            return None
+        return np.where(sorted_values[:, 0] < sorted_values[:, -1], 0.5, 0.0)
@@ -0,0 +1,248 @@
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import numpy as np
+from scipy.stats import gaussian_kde
+
+from profiling import count, stage, timed
+from results_cache import images
+
+def render_png(fig):
+    """
+    Rasterize a figure to PNG for Streamlit and close it.
+    """
+    buf = BytesIO()
+    with stage('savefig'):
+        fig.savefig(buf, format='png', bbox_inches='tight')
+    buf.seek(0)
+    plt.close(fig)
+    return buf
+
+def figure_radar_fixed_mean(input_data, std_devs, categories, player_name, note=""):
+    num_vars = len(categories)
+    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
+
+    # Complete the circle for radar chart
+    input_data = np.concatenate((input_data, [input_data[0]]))
+    mean_data = np.concatenate(([1] * num_vars, [1]))  # Fixed mean value for all metrics
+    std_devs = np.concatenate((std_devs, [std_devs[0]]))
+    angles += angles[:1]
+
+    # Start the plot
+    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+
+    # Shaded area for standard deviation
+    lower_bound = np.clip(mean_data - std_devs, 0, None)  # Ensure lower bound is not negative
+    upper_bound = mean_data + std_devs
+    ax.fill_between(angles, lower_bound, upper_bound, color='grey', alpha=0.3, label="± 1 Std Dev")
+
+    # Average line
+    ax.plot(angles, mean_data, color='black', linewidth=2, linestyle='solid', label="Group Average")
+
+    # Input data line
+    ax.plot(angles, input_data, color='lightcoral', linewidth=2, linestyle='solid', label=f"{player_name}'s Data")
+    ax.fill(angles, input_data, color='lightcoral', alpha=0.25)
+
+    # Customize axes
+    ax.set_yticklabels([])
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(categories, color='black')
+
+    ax.yaxis.set_ticks(np.linspace(0, 1.5, 6))
+    
+    ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+
+    if note:
+        fig.text(0.5, 0.02, note, ha="center", fontsize=8, color="grey")
+    return fig
+
+def plot_radar_fixed_mean(input_data, std_devs, categories, player_name, note=""):
+    # Return the BytesIO object for Streamlit
+    return render_png(figure_radar_fixed_mean(input_data, std_devs, categories, player_name, note))
+
+@timed('gaussian_kde')
+def compute_density_grid(metric_data, num_points=500):
+    """
+    Evaluate a metric's KDE curve and its ±1 std band once for a cohort.
+    The result only depends on the cohort, so it can be cached and reused for every player.
+    """
+    metric_data = np.asarray(metric_data, dtype=float)
+    metric_data = metric_data[~np.isnan(metric_data)]
+    kde = gaussian_kde(metric_data)
+
+    # Calculate mean and standard deviation
+    mean = metric_data.mean()
+    std = metric_data.std(ddof=1)
+
+    # Set a wider x-axis range, extended by 3 standard deviations on both sides
+    x_min = metric_data.min() - 3 * std
+    x_max = metric_data.max() + 3 * std
+    x_vals = np.linspace(x_min, x_max, num_points)
+    std_x_vals = np.linspace(mean - std, mean + std, num_points)
+
+    grid = {
+        'x_min': x_min,
+        'x_max': x_max,
+        'x_vals': x_vals,
+        'y_vals': kde(x_vals),
+        'std_x_vals': std_x_vals,
+        'std_y_vals': kde(std_x_vals),
+    }
+    for values in grid.values():
+        if isinstance(values, np.ndarray):
+            values.setflags(write=False)
+    return grid
+
+# Function to generate metric distribution plots
+def figure_metric_distributions(input_metrics, density_grids, categories, player_name):
+    """
+    Plots individual input data points on the distribution curves (PDFs) of the selected level's metrics,
+    with standard deviation bands shaded and a vertical line marking the player's value.
+    `density_grids` maps each metric to its precomputed `compute_density_grid` result.
+    """
+    num_metrics = len(categories)
+    fig, axes = plt.subplots(nrows=num_metrics, ncols=1, figsize=(6, num_metrics * 3))  # Reduced width for side alignment
+
+    for i, metric in enumerate(categories):
+        ax = axes[i] if num_metrics > 1 else axes
+        grid = density_grids[metric]
+        x_min, x_max = grid['x_min'], grid['x_max']
+        x_vals, y_vals = grid['x_vals'], grid['y_vals']
+
+        # Plot the KDE curve
+        ax.plot(x_vals, y_vals, color='royalblue', label=f"{metric} Distribution", alpha=0.7)
+        ax.fill_between(x_vals, y_vals, color='royalblue', alpha=0.3)
+
+        # Shade the one standard deviation region
+        ax.fill_between(grid['std_x_vals'], 0, grid['std_y_vals'], color='cornflowerblue', alpha=0.4, label="±1 Std Dev")
+
+        # Plot the vertical line stopping at the intersection point for input value
+        input_value = input_metrics[metric]
+        if x_min <= input_value <= x_max:
+            input_y = float(np.interp(input_value, x_vals, y_vals))  # Interpolate on the cached curve instead of re-evaluating the KDE
+            ax.plot([input_value, input_value], [0, input_y], color='lightcoral', linestyle='-', linewidth=2, label=f"{player_name}'s Value")
+            ax.scatter([input_value], [input_y], color='coral', s=50)  # Mark the point of intersection with a dot
+
+        # Title and labels
+        ax.set_title(f"{metric} Distribution", fontsize=12)
+        ax.set_xlim(x_min, x_max)  # Explicitly set x-axis limits to show the full distribution
+        ax.set_yticks([])  # Hide y-axis ticks for cleaner appearance
+
+
+    fig.tight_layout()
+    return fig
+
+def plot_metric_distributions(input_metrics, density_grids, categories, player_name):
+    # Save the figure to BytesIO for Streamlit
+    return render_png(figure_metric_distributions(input_metrics, density_grids, categories, player_name))
+
+def figure_radar(input_data, comparison_data, categories, player_name, comparison_label, note=""):
+    num_vars = len(categories)
+    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
+
+    input_data = np.concatenate((input_data, [input_data[0]]))
+    comparison_data = np.concatenate((comparison_data, [comparison_data[0]]))
+    angles += angles[:1]
+
+    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    ax.fill(angles, input_data, color='lightcoral', alpha=0.25, label=f"{player_name}'s Data" if player_name else 'Input Data')
+    ax.fill(angles, comparison_data, color='cornflowerblue', alpha=0.25, label=comparison_label)
+    ax.plot(angles, input_data, color='lightcoral', linewidth=2, linestyle='solid')
+    ax.plot(angles, comparison_data, color='cornflowerblue', linewidth=2, linestyle='solid')
+
+    ax.set_yticklabels([])
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(categories, color='black')
+
+    ax.yaxis.set_ticks(np.linspace(0, 1, 6))
+    ax.yaxis.set_ticklabels(['0', '20', '40', '60', '80', '100'], color='grey')
+
+    ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+    
+    if note:
+        fig.text(0.5, 0.02, note, ha="center", fontsize=8, color="grey")
+    return fig
+
+def plot_radar(input_data, comparison_data, categories, player_name, comparison_label, note=""):
+    # Use BytesIO to pass the image to Streamlit
+    return render_png(figure_radar(input_data, comparison_data, categories, player_name, comparison_label, note))
+
+def draw_metric_bar(ax, metric, player_percentile, player_value, label=None):
+    # `label` is the rounded percentile, when the bar is drawn from an already rounded one
+    label = round(player_percentile) if label is None else label
+    color = plt.cm.coolwarm(player_percentile / 100)
+    ax.barh(' ', player_percentile, color=color, edgecolor='black')
+    ax.text(110, 0, f"{player_value:.2f}", va='center', ha='left', color='black', fontsize=8)  # Player value
+    ax.text(player_percentile - 6, 0, f"{label}", va='center', ha='left', color='white', fontsize=8)  # Rounded percentile value at the right end
+    ax.set_xlim(0, 100)
+    ax.set_title(metric, fontsize=10, color='black')
+    ax.spines['top'].set_visible(True)
+    ax.spines['bottom'].set_visible(True)
+    ax.spines['left'].set_visible(True)
+    ax.spines['right'].set_visible(True)
+    ax.yaxis.set_visible(False)
+    ax.xaxis.set_visible(False)
+
+def plot_metric(metric, player_percentile, player_value):
+    fig, ax = plt.subplots(figsize=(6, 1))  # Adjusted width and height
+    draw_metric_bar(ax, metric, player_percentile, player_value)
+
+    # Use BytesIO to pass the image to Streamlit
+    return render_png(fig)
+
+def figure_metric_panel(bars):
+    """
+    Every (metric, percentile, label, value) bar from `metric_panel_bars` stacked in one figure.
+    """
+    fig, axes = plt.subplots(nrows=len(bars), ncols=1, figsize=(6, 1.25 * len(bars)), squeeze=False)
+    for ax, (metric, player_percentile, label, player_value) in zip(axes[:, 0], bars):
+        draw_metric_bar(ax, metric, player_percentile, player_value, label)
+    fig.tight_layout()
+    return fig
+
+def _render_metric_panel(bars):
+    count('metric_panel_renders')
+    return render_png(figure_metric_panel(bars)).getvalue()
+
+def plot_metric_panel(categories, player_percentiles, player_values):
+    """
+    Render every metric's percentile bar as one figure.
+
+    The PNG is memoized in the shared image cache on what the bars show: the
+    bar length to 0.1, the label rounded from the exact percentile and the
+    value to 0.01. Repeated inputs skip matplotlib entirely.
+    """
+    count('metric_panel_requests')
+    bars = metric_panel_bars(categories, player_percentiles, player_values)
+    return BytesIO(images.get(('metric_panel_png', bars), lambda: _render_metric_panel(bars)))
+
+def metric_panel_bars(categories, player_percentiles, player_values):
+    return tuple(
+        (metric, round(float(percentile), 1), round(float(percentile)), round(float(value), 2))
+        for metric, percentile, value in zip(categories, player_percentiles, player_values)
+    )
+
+def figure_ladder_heatmap(percentiles, row_labels, categories, player_name, divider=None):
+    """
+    (cohorts x metrics) percentile heatmap with each cell labeled; a line after `divider` rows separates Levels from Positions.
+    """
+    percentiles = np.asarray(percentiles, dtype=float) * 100
+    fig, ax = plt.subplots(figsize=(1.4 * len(categories) + 2, 0.45 * len(row_labels) + 1.5))
+    ax.imshow(np.ma.masked_invalid(percentiles), cmap='coolwarm', vmin=0, vmax=100, aspect='auto')
+
+    for (row, column), value in np.ndenumerate(percentiles):
+        if not np.isnan(value):
+            ax.text(column, row, f"{round(value)}", ha='center', va='center', fontsize=8, color='white' if abs(value - 50) > 30 else 'black')
+    if divider:
+        ax.axhline(divider - 0.5, color='black', linewidth=2)
+
+    ax.set_xticks(range(len(categories)))
+    ax.set_xticklabels(categories, fontsize=9, rotation=30, ha='right')
+    ax.set_yticks(range(len(row_labels)))
+    ax.set_yticklabels(row_labels, fontsize=9)
+    ax.set_title(f"{player_name}'s Percentile at Every Level and Position" if player_name else "Percentile at Every Level and Position", fontsize=12)
+    fig.tight_layout()
+    return fig
+
+def plot_ladder_heatmap(percentiles, row_labels, categories, player_name, divider=None):
+    return render_png(figure_ladder_heatmap(percentiles, row_labels, categories, player_name, divider))
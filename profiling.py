@@ -0,0 +1,147 @@
+"""
+Lightweight stage timers and counters.
+
+Timing is only recorded between `start_run()` and `finish_run()` on the same
+thread (one Streamlit rerun or one request); everywhere else `stage()` hands
+back a shared no-op context manager, so instrumented code costs one
+thread-local lookup when profiling is off.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Append every finished run to this JSON-lines file when set
+LOG_ENV_VAR = 'HORSEPOWER_PROFILE_LOG'
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_stage = _NullStage()
+
+
+class Run:
+    """
+    Timings and counters collected during one profiled run.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.total = None
+        self.stages = {}
+        self.counters = {}
+
+    def add(self, name, seconds):
+        entry = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        return {
+            'label': self.label,
+            'started_at': self.started_at,
+            'total_seconds': self.total,
+            'stages': self.stages,
+            'counters': self.counters,
+        }
+
+
+def start_run(label=None):
+    """
+    Begin collecting for the current thread, replacing any unfinished run.
+    """
+    _local.run = Run(label)
+    return _local.run
+
+
+def finish_run(log_path=None):
+    """
+    Stop collecting and return the run, appending it to the JSON-lines log if configured.
+    """
+    run = getattr(_local, 'run', None)
+    _local.run = None
+    if run is None:
+        return None
+    run.total = time.perf_counter() - run._start
+
+    log_path = log_path or os.environ.get(LOG_ENV_VAR)
+    if log_path:
+        line = json.dumps(run.to_dict())
+        with _log_lock, open(log_path, 'a') as f:
+            f.write(line + '\n')
+    return run
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+@contextmanager
+def _timed_stage(run, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add(name, time.perf_counter() - start)
+
+
+def stage(name):
+    """
+    Context manager timing a block under `name`.
+    """
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return _null_stage
+    return _timed_stage(run, name)
+
+
+def timed(name):
+    """
+    Decorator form of `stage`.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, 'run', None)
+            if run is None:
+                return fn(*args, **kwargs)
+            with _timed_stage(run, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run.count(name, n)
+
+
+def summary_rows(run):
+    """
+    Per-stage rows, slowest first, for display.
+    """
+    rows = [
+        {'Stage': name, 'Calls': entry['calls'], 'ms': round(entry['seconds'] * 1000, 2)}
+        for name, entry in run.stages.items()
+    ]
+    rows.sort(key=lambda row: row['ms'], reverse=True)
+    if run.total is not None:
+        rows.append({'Stage': 'total', 'Calls': 1, 'ms': round(run.total * 1000, 2)})
+    return rows
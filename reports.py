@@ -0,0 +1,230 @@
+"""
+Printable evaluation reports for a whole list of players.
+
+    python reports.py showcase.csv --out reports/ --workers 8
+
+takes a roster CSV (the same columns as Batch Roster scoring) and writes one
+multi-page PDF per player, containing every comparison chart the app shows.
+Use --format png for one image per chart, or --combined for a single PDF.
+Scoring happens once in this process. Figure rendering, which dominates the
+run time and which matplotlib cannot share across threads, is spread over a
+process pool, except for --combined, whose one PDF is drawn in this process.
+"""
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+import numpy as np
+import pandas as pd
+
+from batch import read_roster
+from dataset import DEFAULT_CSV, all_metrics, metrics
+from plots import (
+    compute_density_grid, figure_metric_distributions, figure_metric_panel, figure_radar, figure_radar_fixed_mean,
+    metric_panel_bars,
+)
+from scoring import input_vector, load_engine
+
+# Resolution of PNG pages
+REPORT_DPI = 150
+
+# Chart kinds a report page can hold
+chart_figures = {
+    'radar': figure_radar,
+    'radar_fixed_mean': figure_radar_fixed_mean,
+    'metric_panel': figure_metric_panel,
+    'distributions': figure_metric_distributions,
+}
+
+
+def player_name(player, index):
+    if isinstance(player.get('Player Name'), str) and player['Player Name'].strip():
+        return player['Player Name'].strip()
+    name = ' '.join(str(player[column]) for column in ('First Name', 'Last Name') if pd.notna(player.get(column)))
+    return name or f"Player {index + 1}"
+
+
+def level_density_grids(engine, level):
+    grids = {}
+    for metric in metrics:
+        values = engine.cohort_values('Level', level, metric)
+        if len(values) > 1:
+            grids[metric] = compute_density_grid(values)
+    return grids
+
+
+def report_charts(engine, name, input_metrics, input_data, level=None, position=None, density_grids=None):
+    """
+    (title, chart kind, figure arguments) for every page of one player's report.
+
+    Everything here is plain data, so pages can be drawn in another process.
+    """
+    charts = []
+    if level:
+        comparison = engine.level_comparison(input_data, 'Level', level)
+        if comparison is not None:
+            charts.append(("Compare to Level (Percentiles)", 'radar', {
+                'input_data': comparison['input_percentiles'],
+                'comparison_data': comparison['comparison_percentiles'],
+                'categories': all_metrics,
+                'player_name': name,
+                'comparison_label': comparison['label'],
+            }))
+            charts.append((f"Percentiles within {level}", 'metric_panel', {
+                'bars': metric_panel_bars(all_metrics, comparison['input_percentiles'] * 100, input_data),
+            }))
+
+        mean_std = engine.mean_std_comparison(input_metrics, 'Level', level)
+        if mean_std is not None:
+            charts.append(("Compare to Level (Mean/StD)", 'radar_fixed_mean', {
+                'input_data': mean_std['input_normalized'],
+                'std_devs': mean_std['std_devs'],
+                'categories': metrics,
+                'player_name': name,
+                'note': f"Comparison to {level} group (values as percentages of the mean).",
+            }))
+        if density_grids and len(density_grids) == len(metrics):
+            charts.append((f"Metric Distributions in {level}", 'distributions', {
+                'input_metrics': input_metrics,
+                'density_grids': density_grids,
+                'categories': metrics,
+                'player_name': name,
+            }))
+
+        if position:
+            position_comparison = engine.position_comparison(input_data, level, position)
+            if position_comparison is not None:
+                charts.append(("Compare to Position", 'radar', {
+                    'input_data': position_comparison['input_percentiles'],
+                    'comparison_data': position_comparison['comparison_percentiles'],
+                    'categories': all_metrics,
+                    'player_name': name,
+                    'comparison_label': position_comparison['label'],
+                }))
+
+    closest = engine.closest_matches(input_data, k=1)
+    if not closest.empty:
+        match = engine.data.loc[closest.index[0]]
+        compared = engine.compare_to_row(input_data, match)
+        if compared is not None:
+            charts.append(("Closest Match", 'radar', {
+                'input_data': compared['input_percentiles'],
+                'comparison_data': compared['comparison_percentiles'],
+                'categories': all_metrics,
+                'player_name': name,
+                'comparison_label': f"Closest Match: {match['First Name']} {match['Last Name']}",
+            }))
+    return charts
+
+
+def draw_page(name, title, kind, arguments):
+    fig = chart_figures[kind](**arguments)
+    fig.suptitle(f"{name}: {title}", fontsize=12, y=1.02)
+    return fig
+
+
+def render_report(report, output_dir, fmt='pdf'):
+    """
+    Draw one player's report to disk (runs in a worker process); returns the written paths.
+    """
+    stem = os.path.join(output_dir, report['slug'])
+    if fmt == 'pdf':
+        path = f"{stem}.pdf"
+        with PdfPages(path) as pdf:
+            for title, kind, arguments in report['charts']:
+                fig = draw_page(report['name'], title, kind, arguments)
+                pdf.savefig(fig, bbox_inches='tight')
+                plt.close(fig)
+        return [path]
+
+    paths = []
+    for page, (title, kind, arguments) in enumerate(report['charts'], 1):
+        path = f"{stem}-{page}.png"
+        fig = draw_page(report['name'], title, kind, arguments)
+        fig.savefig(path, format='png', dpi=REPORT_DPI, bbox_inches='tight')
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def write_combined(path, reports):
+    """
+    Draw every player's pages, as vector graphics, into one PDF.
+
+    PdfPages can only be written from one process, so these pages are drawn
+    here, one at a time, rather than in the pool.
+    """
+    with PdfPages(path) as pdf:
+        for report in reports:
+            for title, kind, arguments in report['charts']:
+                fig = draw_page(report['name'], title, kind, arguments)
+                pdf.savefig(fig, bbox_inches='tight')
+                plt.close(fig)
+
+
+def build_reports(roster, engine, level=None):
+    """
+    Score every roster row and lay out its report pages; rows missing a metric are skipped.
+    """
+    reports = []
+    grids = {}
+    complete = roster[metrics].notna().all(axis=1).to_numpy()
+    for index, (_, player) in enumerate(roster.iterrows()):
+        if not complete[index]:
+            continue
+        name = player_name(player, index)
+        input_metrics = {metric: float(player[metric]) for metric in metrics}
+        input_data = input_vector(input_metrics)
+        player_level = level or (player['Level'] if isinstance(player.get('Level'), str) else None)
+        position = player['Position'] if isinstance(player.get('Position'), str) else None
+        if player_level and player_level not in grids:
+            grids[player_level] = level_density_grids(engine, player_level)
+
+        reports.append({
+            'name': name,
+            'slug': f"{index + 1:03d}-{re.sub(r'[^A-Za-z0-9]+', '-', name).strip('-') or 'player'}",
+            'charts': report_charts(engine, name, input_metrics, np.array(input_data), player_level, position, grids.get(player_level)),
+        })
+    return reports
+
+
+def generate_reports(roster, output_dir, csv_path=DEFAULT_CSV, fmt='pdf', combined=False, level=None, workers=None):
+    """
+    Write reports for every player in the roster; returns the written paths.
+    """
+    engine = load_engine(csv_path)
+    reports = build_reports(roster, engine, level)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if combined:
+        path = os.path.join(output_dir, 'reports.pdf')
+        write_combined(path, reports)
+        return [path]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [path for paths in pool.map(render_report, reports, repeat(output_dir), repeat(fmt)) for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render evaluation reports for every player in a roster CSV.")
+    parser.add_argument('roster', help="Roster CSV with one row per player")
+    parser.add_argument('--out', default='reports', help="Output directory")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="Source dataset")
+    parser.add_argument('--format', choices=['pdf', 'png'], default='pdf', help="One PDF per player, or one PNG per chart")
+    parser.add_argument('--combined', action='store_true', help="Write every player into a single PDF")
+    parser.add_argument('--level', default=None, help="Compare everyone to this Level instead of their own")
+    parser.add_argument('--workers', type=int, default=None, help="Rendering processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    roster = read_roster(args.roster)
+    paths = generate_reports(roster, args.out, args.csv, args.format, args.combined, args.level, args.workers)
+    print(f"Wrote {len(paths)} files to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
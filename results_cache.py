@@ -0,0 +1,83 @@
+"""
+Bounded memos of per-player results shared by every session of the app.
+
+Keys are built from the player's metric vector and the cohort selection, never
+the player's name, so renaming a player reuses every result and only the chart
+labels change. Small result dicts and rendered PNGs live in separate caches:
+`results` is bounded by entry count, `images` by the total bytes it holds.
+"""
+import threading
+from collections import OrderedDict
+
+from profiling import count
+
+# Most results kept before the least recently used are dropped
+RESULT_CACHE_SIZE = 1024
+
+# Total size of the rendered PNGs kept before the least recently used are dropped
+IMAGE_CACHE_BYTES = 16 * 1024 * 1024
+
+
+def input_key(values):
+    """
+    Hashable form of an input vector, so that e.g. 60, 60.0 and np.float64(60) share one entry
+    and missing values (NaN) compare equal.
+    """
+    return tuple(None if value != value else float(value) for value in values)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU mapping of keys to computed results.
+
+    Bounded by `maxsize` entries and, if `maxbytes` is given, by the total
+    `len()` of the values (for caches of bytes). Cached values are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, maxbytes=None, name='result_cache'):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.name = name
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, compute):
+        """
+        The cached value for `key`, calling `compute()` to fill it on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                count(f'{self.name}_hits')
+                return self._entries[key]
+
+        # Computed outside the lock; two sessions racing on one key both compute it once
+        count(f'{self.name}_misses')
+        value = compute()
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._size(self._entries[key])
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self.nbytes += self._size(value)
+            while len(self._entries) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes):
+                self.nbytes -= self._size(self._entries.popitem(last=False)[1])
+        return value
+
+    def _size(self, value):
+        return len(value) if self.maxbytes is not None else 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+# Shared across Streamlit reruns and sessions
+results = ResultCache()
+images = ResultCache(maxbytes=IMAGE_CACHE_BYTES, name='image_cache')
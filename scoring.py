@@ -0,0 +1,329 @@
+import copy
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset import DEFAULT_CSV, all_metrics, anthropometric_columns, combine_frames, composite_positions, load_dataset_state, metrics
+from cohort_cube import load_cube, updated_cube
+from matching import ClosestMatchIndex
+from names import NameIndex
+from percentiles import PercentileIndex, cohort_key, cohort_row_ids, ladder_cohorts
+from profiling import timed
+
+# Columns reported for matched players
+match_columns = ['First Name', 'Last Name', 'Age', 'Level', 'Position'] + all_metrics
+
+# Decimal places kept for floats in JSON results
+JSON_DECIMALS = 4
+
+_lock = threading.Lock()
+_engines = {}
+
+
+def compute_horsepower(input_metrics):
+    return input_metrics['Vertical Jump'] + input_metrics['Med Ball SitUp'] + input_metrics['Med Ball Chest']
+
+
+def input_vector(input_metrics):
+    """
+    Player values in `all_metrics` order, with Horsepower appended.
+    """
+    return [float(input_metrics[metric]) for metric in metrics] + [float(compute_horsepower(input_metrics))]
+
+
+class ScoringEngine:
+    """
+    UI-free scoring over one dataset: cohort filtering, percentiles and closest matches.
+
+    Indexes are built once and shared; every method is safe to call from several threads.
+    Cohorts are kept as integer row positions into one float32 metric matrix,
+    so comparisons gather only the rows they need instead of copying frames.
+    """
+
+    @timed('engine_build')
+    def __init__(self, data, cube=None):
+        self.data = data
+        self.cube = cube
+        self.values = data[all_metrics].to_numpy(dtype=np.float32)
+        self.values.setflags(write=False)
+        self._cohorts = cohort_row_ids(data)
+        self.percentile_index = PercentileIndex(data, cohorts=self._cohorts)
+        self.names = NameIndex(data)
+        self._player_percentiles = None
+        self.positions = sorted(data['Position'].dropna().unique()) + list(composite_positions)
+        self._match_indexes = {}
+        self._lock = threading.Lock()
+
+    @timed('engine_extend')
+    def with_batch(self, batch, data=None, cube=None):
+        """
+        New engine over the data plus an appended batch of players.
+
+        `data` is the already-combined frame, if the caller has one, and `cube`
+        an already-updated cube. Otherwise only the Level, Age and Position
+        cohorts (and cube cells) the batch falls into are re-sorted or
+        recomputed; everything else is shared with this engine. Closest-match
+        trees are rebuilt lazily on first use.
+        """
+        start = len(self.data)
+        engine = copy.copy(self)
+        engine.data = combine_frames([self.data, batch]) if data is None else data
+        engine.values = np.vstack([self.values, batch[all_metrics].to_numpy(dtype=np.float32)])
+        engine.values.setflags(write=False)
+
+        batch_cohorts = {key: rows + start for key, rows in cohort_row_ids(batch).items()}
+        engine._cohorts = dict(self._cohorts)
+        for key, rows in batch_cohorts.items():
+            engine._cohorts[key] = np.concatenate((self.cohort_rows(*key), rows))
+        engine.percentile_index = self.percentile_index.with_values({
+            key: batch.iloc[rows - start] for key, rows in batch_cohorts.items()
+        })
+        engine.names = self.names.with_rows(batch, start)
+        engine.positions = sorted(engine.data['Position'].dropna().unique()) + list(composite_positions)
+        engine._match_indexes = {}
+        engine._lock = threading.Lock()
+
+        # Players in untouched levels keep their percentiles
+        engine._player_percentiles = None
+        if self._player_percentiles is not None:
+            percentiles = np.vstack([self._player_percentiles, np.full(batch[all_metrics].shape, np.nan)])
+            for group_by, level in batch_cohorts:
+                if group_by == 'Level':
+                    rows = engine.cohort_rows('Level', level)
+                    percentiles[rows] = engine.percentile_index.percentiles('Level', level, engine.values[rows])
+            percentiles.setflags(write=False)
+            engine._player_percentiles = percentiles
+
+        if cube is not None:
+            engine.cube = cube
+        elif self.cube is not None:
+            engine.cube = updated_cube(self.cube, batch, self.cube.manifest['signature'], self.cube.manifest['digest'])
+        return engine
+
+    def match_index(self, include_body=False):
+        index = self._match_indexes.get(include_body)
+        if index is None:
+            with self._lock:
+                index = self._match_indexes.get(include_body)
+                if index is None:
+                    extra_columns = anthropometric_columns if include_body else ()
+                    index = self._match_indexes[include_body] = ClosestMatchIndex(self.data, extra_columns)
+        return index
+
+    def cohort_rows(self, group_by, group_value):
+        """
+        Row positions of the cohort (empty if nobody matches).
+        """
+        return self._cohorts.get(cohort_key(group_by, group_value), np.empty(0, dtype=np.intp))
+
+    def position_rows(self, level, position):
+        return np.intersect1d(self.cohort_rows('Level', level), self.cohort_rows('Position', position), assume_unique=True)
+
+    def _cube_cell(self, level=None, position=None, age=None):
+        if self.cube is None:
+            return None
+        return self.cube.cell(level, position, age)
+
+    def metric_values(self, rows, metric):
+        return self.values[rows, all_metrics.index(metric)]
+
+    def cohort_values(self, group_by, group_value, metric):
+        return self.metric_values(self.cohort_rows(group_by, group_value), metric)
+
+    def level_comparison(self, input_data, group_by, group_value):
+        """
+        Input percentiles and the group-average percentiles, or None for an empty group.
+        """
+        if not self.percentile_index.size(group_by, group_value):
+            return None
+        return {
+            'input_percentiles': self.percentile_index.percentiles(group_by, group_value, input_data),
+            'comparison_percentiles': self.percentile_index.group_average(group_by, group_value),
+            'label': f"{group_value} {group_by} Average",
+        }
+
+    def mean_std_comparison(self, input_metrics, group_by, group_value):
+        """
+        Group means, std devs as a share of the mean, and the input as a share of the mean.
+        """
+        if group_by == 'Level':
+            cell = self._cube_cell(level=group_value)
+        elif group_by == 'Age':
+            cell = self._cube_cell(age=group_value)
+        else:
+            cell = None
+
+        if cell is not None:
+            average_values = self.cube.mean(cell, metrics)
+            std_devs = self.cube.std(cell, metrics) / average_values  # Std dev as a percentage of the mean
+        else:
+            rows = self.cohort_rows(group_by, group_value)
+            if not len(rows):
+                return None
+
+            # Drop players missing any of the metrics
+            comparison_group = self.values[rows, :len(metrics)].astype(float)
+            comparison_group = comparison_group[~np.isnan(comparison_group).any(axis=1)]
+
+            # Calculate averages and standard deviations for the selected group
+            average_values = comparison_group.mean(axis=0)
+            std_devs = comparison_group.std(axis=0, ddof=1) / average_values  # Std dev as a percentage of the mean
+
+        # Normalize input data as a percentage of the mean
+        input_normalized = [input_metrics[metric] / avg for metric, avg in zip(metrics, average_values)]
+        return {
+            'average_values': average_values,
+            'std_devs': std_devs,
+            'input_normalized': input_normalized,
+        }
+
+    def find_player(self, first_name, last_name):
+        rows = self.names.lookup(f"{first_name} {last_name}")
+        return self.data.iloc[rows[0]] if rows else None
+
+    def player_percentiles(self, row):
+        """
+        Percentiles of the player at position `row` within their own Level.
+
+        Every player's percentiles are computed together, one batched lookup per
+        level, the first time any of them is needed.
+        """
+        if self._player_percentiles is None:
+            with self._lock:
+                if self._player_percentiles is None:
+                    self._player_percentiles = self._compute_player_percentiles()
+        return self._player_percentiles[row]
+
+    def _compute_player_percentiles(self):
+        percentiles = np.full(self.values.shape, np.nan)
+        for (group_by, level), rows in self._cohorts.items():
+            if group_by == 'Level':
+                percentiles[rows] = self.percentile_index.percentiles('Level', level, self.values[rows])
+        percentiles.setflags(write=False)
+        return percentiles
+
+    def compare_to_row(self, input_data, row):
+        """
+        Percentiles of the input and of another player, both within that player's Level.
+        """
+        level = row['Level']
+        if not self.percentile_index.size('Level', level):
+            return None
+        return {
+            'level': level,
+            'input_percentiles': self.percentile_index.percentiles('Level', level, input_data),
+            'comparison_percentiles': self.player_percentiles(self.data.index.get_loc(row.name)),
+        }
+
+    def closest_matches(self, input_data, k=1, level=None, position=None, body_values=None):
+        """
+        The k closest players (with a Distance column), nearest first.
+        """
+        include_body = body_values is not None
+        values = list(input_data) + (list(body_values) if include_body else [])
+        rows, distances = self.match_index(include_body).query(values, k=k, level=level, position=position)
+        matches = self.data.iloc[rows][match_columns].copy()
+        matches.insert(0, 'Distance', np.round(distances, 3))
+        return matches
+
+    def position_comparison(self, input_data, level, position):
+        """
+        Input percentiles and the position average's percentiles, both within the Level.
+        """
+        cell = self._cube_cell(level=level, position=position)
+        if cell is not None:
+            position_averages = self.cube.mean(cell, all_metrics)
+        else:
+            rows = self.position_rows(level, position)
+            if not len(rows):
+                return None
+            position_averages = np.nanmean(self.values[rows].astype(float), axis=0)
+        return {
+            'input_percentiles': self.percentile_index.percentiles('Level', level, input_data),
+            'comparison_percentiles': self.percentile_index.percentiles('Level', level, position_averages),
+            'label': f"{position} Average in {level}",
+        }
+
+    def level_ladder(self, input_data):
+        """
+        The input's percentiles against every Level and every Position in one batched lookup.
+
+        Returns the cohort keys and a (cohorts x metrics) matrix, Levels first in ladder order.
+        """
+        keys = ladder_cohorts(self.percentile_index, self.positions)
+        return {'cohorts': keys, 'percentiles': self.percentile_index.ladder(keys, input_data)}
+
+    def score(self, input_metrics, group_by='Level', group_value=None, matches=1, match_level=None, match_position=None):
+        """
+        JSON-ready scoring of one player: Horsepower, cohort percentiles and closest matches.
+        """
+        input_data = input_vector(input_metrics)
+        result = {'horsepower': _json_value(input_data[-1])}
+        if group_by == 'Age' and group_value is not None:
+            group_value = float(pd.to_numeric(group_value, errors='coerce'))
+
+        if group_value is not None:
+            comparison = self.level_comparison(input_data, group_by, group_value)
+            result['cohort'] = {'group_by': group_by, 'group_value': _json_value(group_value), 'size': self.percentile_index.size(group_by, group_value)}
+            result['percentiles'] = None if comparison is None else _percentile_dict(comparison['input_percentiles'])
+
+        if matches:
+            closest = self.closest_matches(input_data, k=int(matches), level=match_level, position=match_position)
+            result['closest_matches'] = [
+                {key: _json_value(value) for key, value in row.items()}
+                for row in closest.to_dict(orient='records')
+            ]
+            if not closest.empty:
+                compared = self.compare_to_row(input_data, self.data.loc[closest.index[0]])
+                if compared is not None:
+                    result['match_level'] = compared['level']
+                    result['match_level_percentiles'] = _percentile_dict(compared['input_percentiles'])
+        return result
+
+
+def _json_value(value):
+    if isinstance(value, (np.generic,)):
+        value = value.item()
+    if isinstance(value, float):
+        # float32 columns would otherwise print as e.g. 64.19999694824219
+        return None if math.isnan(value) else round(value, JSON_DECIMALS)
+    return value
+
+
+def _percentile_dict(percentiles):
+    return {metric: round(float(value) * 100, 2) for metric, value in zip(all_metrics, percentiles)}
+
+
+def load_engine(csv_path=DEFAULT_CSV):
+    """
+    Shared ScoringEngine for the CSV.
+
+    It is rebuilt when the CSV changes; sessions ingested since the last call
+    are folded in with `with_batch`, touching only the cohorts they fall into.
+    """
+    key = os.path.abspath(csv_path)
+    state = load_dataset_state(key)
+    cached = _engines.get(key)
+    if cached is not None and cached['signature'] == state['signature']:
+        return cached['engine']
+
+    with _lock:
+        cached = _engines.get(key)
+        if cached is not None and cached['signature'] == state['signature']:
+            return cached['engine']
+        if cached is not None and cached['generation'] == state['generation']:
+            engine = cached['engine']
+            if len(state['data']) > len(engine.data):
+                batch = state['data'].iloc[len(engine.data):].reset_index(drop=True)
+                # Reuse the cube the ingest wrote, if it matches; otherwise update the affected cells here
+                cube = load_cube(key, build_if_stale=False)
+                if cube is not None and tuple(cube.manifest['signature']) != state['signature']:
+                    cube = None
+                engine = engine.with_batch(batch, state['data'], cube)
+        else:
+            engine = ScoringEngine(state['data'], load_cube(key))
+        _engines[key] = {'signature': state['signature'], 'generation': state['generation'], 'engine': engine}
+    return engine
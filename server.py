@@ -0,0 +1,197 @@
+"""
+Local JSON scoring service.
+
+    python server.py --port 8502
+
+POST /score with a body such as
+    {"metrics": {"Grip Strength (Bottom Hand)": 60, ...}, "group_by": "Level", "group_value": "College", "matches": 3}
+returns Horsepower, cohort percentiles and the closest matches. GET /health reports readiness.
+"""
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from dataset import DEFAULT_CSV, metrics
+from percentiles import group_columns
+from scoring import load_engine
+import profiling
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 64 * 1024
+
+# Connections the listening socket queues while every handler thread is busy
+REQUEST_QUEUE_SIZE = 128
+
+# Most closest matches returned for one request, as in the app's "Number of Matches" input
+MAX_MATCHES = 25
+
+
+def read_metrics(request):
+    """
+    The request's metric values as floats; raise ValueError naming every metric that is missing or not a number.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("the body must be a JSON object")
+    values = request.get('metrics')
+    if not isinstance(values, dict):
+        raise ValueError("'metrics' must be a JSON object of metric names and numbers")
+    missing = [metric for metric in metrics if metric not in values]
+    non_numeric = [
+        metric for metric in metrics
+        if metric in values and (isinstance(values[metric], bool) or not isinstance(values[metric], (int, float)) or not math.isfinite(values[metric]))
+    ]
+    problems = []
+    if missing:
+        problems.append(f"missing metrics: {', '.join(missing)}")
+    if non_numeric:
+        problems.append(f"non-numeric metrics: {', '.join(non_numeric)}")
+    if problems:
+        raise ValueError('; '.join(problems))
+    return {metric: float(values[metric]) for metric in metrics}
+
+
+def check_options(request):
+    """
+    Raise ValueError or TypeError for request options `ScoringEngine.score` cannot take.
+    """
+    matches = request.get('matches', 1)
+    if isinstance(matches, bool) or not isinstance(matches, int) or not 1 <= matches <= MAX_MATCHES:
+        raise ValueError(f"'matches' must be an integer from 1 to {MAX_MATCHES}, got {matches!r}")
+    group_by = request.get('group_by', 'Level')
+    if not isinstance(group_by, str) or group_by not in group_columns:
+        raise ValueError(f"'group_by' must be one of {', '.join(group_columns)}, got {group_by!r}")
+    for option in ('group_value', 'match_level', 'match_position'):
+        value = request.get(option)
+        if isinstance(value, (dict, list)):
+            raise TypeError(f"'{option}' must be a single value, got {value!r}")
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    server_version = "HorsepowerScoring/1.0"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        engine = load_engine(self.server.csv_path)
+        self._send_json(200, {'status': 'ok', 'players': len(engine.data)})
+
+    def do_POST(self):
+        if self.path != '/score':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self._send_json(411, {'error': 'Content-Length required'})
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {'error': 'Invalid Content-Length'})
+            return
+        if length > MAX_BODY_SIZE:
+            self._send_json(413, {'error': 'Request body too large'})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+            input_metrics = read_metrics(request)
+            check_options(request)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f"Invalid request: {e}"})
+            return
+
+        if os.environ.get(profiling.LOG_ENV_VAR):
+            profiling.start_run('server')
+        try:
+            # Re-checks the CSV signature, so the indexes stay warm until the data changes
+            engine = load_engine(self.server.csv_path)
+            result = engine.score(
+                input_metrics,
+                group_by=request.get('group_by', 'Level'),
+                group_value=request.get('group_value'),
+                matches=request.get('matches', 1),
+                match_level=request.get('match_level'),
+                match_position=request.get('match_position'),
+            )
+        except Exception as e:
+            self.log_error("Scoring failed: %r", e)
+            self._send_json(500, {'error': f"Scoring failed: {e}"})
+            return
+        finally:
+            profiling.finish_run()
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that handles each connection on a fixed-size thread pool.
+    """
+
+    # socketserver's default backlog of 5 leaves a burst of clients waiting on connect retries
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def __init__(self, address, handler, csv_path=DEFAULT_CSV, workers=8, verbose=False):
+        super().__init__(address, handler)
+        self.csv_path = csv_path
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Horsepower scoring over local HTTP/JSON.")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="Source dataset")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--workers', type=int, default=8, help="Request handler threads")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    # Load the dataset and build every index before accepting requests
+    engine = load_engine(args.csv)
+    engine.match_index()
+
+    server = PooledHTTPServer((args.host, args.port), ScoringRequestHandler, args.csv, args.workers, args.verbose)
+    print(f"Serving {len(engine.data)} players on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Mergeable summaries for datasets too large to hold in memory.
+
+`KLLSketch` is a KLL quantile sketch (Karnin, Lang & Liberty, 2016). Its
+memory does not grow with the number of values seen. With the default
+k = 200 it retains a few hundred items (roughly 150-450 once past a few
+thousand values), capped by its level capacities at about 3k. Each rank
+query is, with 99% confidence, off by at most ~1.3% of the cohort
+(normalized rank error). This is the empirical single-query bound the Apache
+DataSketches implementation reports for the same k: 2.296 / k^0.9723, and
+`rank_error(k)` returns it. A percentile shown as 62% therefore most likely
+means 60.7%-63.3%; across many queries about 1 in 100 may fall further out.
+Sketches built from different chunks or files can be merged without losing
+that guarantee.
+
+`RunningMoments` keeps exact per-column counts, means and sums of squared
+deviations (Chan et al.'s pairwise update), so means and standard deviations
+are not approximated at all.
+"""
+import numpy as np
+
+# Default accuracy parameter; larger k means smaller error and more memory
+DEFAULT_K = 200
+
+# Smallest buffer any level of a sketch keeps before compacting
+MIN_LEVEL_CAPACITY = 2
+
+
+def rank_error(k=DEFAULT_K):
+    """
+    Normalized rank error (share of the cohort) of one query on a KLL sketch with accuracy parameter k, at 99% confidence.
+    """
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+    """
+    Approximate ranks and quantiles of a stream of numbers in bounded memory.
+
+    Level h holds items that each stand for 2^h inputs. A level that outgrows
+    its capacity is sorted, and every other item (from a random offset) is
+    promoted to the level above.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._view = None
+
+    def __len__(self):
+        return self.n
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(MIN_LEVEL_CAPACITY, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update_many(self, values):
+        """
+        Add every non-missing value.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._view = None
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Fold another sketch (with the same k) into this one.
+        """
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.n += other.n
+        self._view = None
+        self._compress()
+        return self
+
+    def _compress(self):
+        while True:
+            for level, items in enumerate(self.levels):
+                if len(items) > self._capacity(level):
+                    break
+            else:
+                return
+            self._compact(level)
+
+    def _compact(self, level):
+        if level + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        items = np.sort(self.levels[level])
+        # An odd item out stays behind at its own weight
+        odd = len(items) % 2
+        promoted = items[odd:][self._rng.integers(2)::2]
+        self.levels[level] = items[:odd]
+        self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+
+    def _sorted_view(self):
+        # Every retained item with its weight, sorted once per change for binary searches
+        if self._view is None:
+            values = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+            order = np.argsort(values, kind='stable')
+            self._view = values[order], np.concatenate(([0.0], np.cumsum(weights[order])))
+        return self._view
+
+    def rank(self, values):
+        """
+        Estimated share of inputs strictly below each value.
+        """
+        if not self.n:
+            return np.full(np.shape(values), np.nan)
+        sorted_values, cumulative = self._sorted_view()
+        below = cumulative[np.searchsorted(sorted_values, values, side='left')]
+        return below / cumulative[-1]
+
+    def quantile(self, points):
+        """
+        Estimated values at each quantile point (0-1).
+        """
+        sorted_values, cumulative = self._sorted_view()
+        targets = np.asarray(points, dtype=float) * cumulative[-1]
+        positions = np.searchsorted(cumulative[1:], targets, side='left')
+        return sorted_values[np.clip(positions, 0, len(sorted_values) - 1)]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_view'] = None
+        return state
+
+
+class RunningMoments:
+    """
+    Exact per-column counts, means and variances, updated chunk by chunk and mergeable.
+    """
+
+    def __init__(self, width):
+        self.counts = np.zeros(width)
+        self.means = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    @classmethod
+    def from_summary(cls, counts, means, stds, ddof=1):
+        """
+        Moments rebuilt from stored per-column counts, means and standard deviations.
+        """
+        counts = np.asarray(counts, dtype=float)
+        moments = cls(len(counts))
+        moments.counts = counts
+        moments.means = np.where(counts > 0, np.nan_to_num(means), 0.0)
+        moments.m2 = np.where(counts > ddof, np.nan_to_num(stds) ** 2 * (counts - ddof), 0.0)
+        return moments
+
+    def update_many(self, values):
+        """
+        Add a (rows x columns) block; missing values are skipped per column.
+        """
+        values = np.asarray(values, dtype=float)
+        known = ~np.isnan(values)
+        counts = known.sum(axis=0).astype(float)
+        sums = np.where(known, values, 0.0).sum(axis=0)
+        means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        m2 = np.where(known, (values - means) ** 2, 0.0).sum(axis=0)
+        self._combine(counts, means, m2)
+        return self
+
+    def merge(self, other):
+        self._combine(other.counts, other.means, other.m2)
+        return self
+
+    def _combine(self, counts, means, m2):
+        total = self.counts + counts
+        delta = means - self.means
+        share = np.divide(counts, total, out=np.zeros_like(total), where=total > 0)
+        self.means = self.means + delta * share
+        self.m2 = self.m2 + m2 + delta ** 2 * self.counts * share
+        self.counts = total
+
+    def mean(self):
+        return np.where(self.counts > 0, self.means, np.nan)
+
+    def std(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.counts > ddof, np.sqrt(self.m2 / (self.counts - ddof)), np.nan)
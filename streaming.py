@@ -0,0 +1,301 @@
+"""
+Streaming mode for datasets too large to load as one DataFrame.
+
+    python streaming.py pooled_combines.csv --chunk-rows 200000
+
+reads the CSV (and its ingested sessions) in chunks. It keeps one quantile
+sketch and one set of running moments per (cohort, metric), and pickles them
+next to the CSV. Memory grows with the number of cohorts, not rows. Set
+HORSEPOWER_STREAMING=1 to have the app score against the sketches; percentile
+views then carry the rank error documented in sketches.py.
+"""
+import argparse
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset import (
+    DEFAULT_CSV, all_metrics, clean_dataset, composite_positions, iter_sessions, metrics, sidecar_path, source_signature, used_columns,
+    write_pickle,
+)
+from percentiles import cohort_key, cohort_row_ids, ladder_cohorts, metric_matrix
+from profiling import stage, timed
+from sketches import DEFAULT_K, KLLSketch, RunningMoments, rank_error
+
+# Set to use the sketches instead of the in-memory dataset in the app
+STREAMING_ENV_VAR = 'HORSEPOWER_STREAMING'
+
+# Rows parsed per chunk
+CHUNK_ROWS = 100_000
+
+# Quantile points sampled from a sketch to draw a cohort's density curve
+DENSITY_SAMPLE_POINTS = np.linspace(0.0025, 0.9975, 400)
+
+# Bump whenever the pickled layout changes
+SKETCH_VERSION = 2
+
+# Pickled sketches kept next to the source CSV
+SKETCH_SUFFIX = '.sketches.pkl'
+
+_lock = threading.Lock()
+_engines = {}
+
+
+class CohortSketches:
+    """
+    Quantile sketches and running moments for every Level, Age and Position cohort,
+    plus running moments for each Level x Position pair.
+
+    Percentiles follow `PercentileIndex`: the share of the cohort strictly below
+    the value, with missing metrics counted as 0.
+    """
+
+    def __init__(self, columns=all_metrics, k=DEFAULT_K):
+        self.columns = list(columns)
+        self.k = k
+        self.rows = 0
+        self.positions = set()
+        self._quantiles = {}
+        self._moments = {}
+        self._position_moments = {}
+
+    def _sketches(self, key):
+        sketches = self._quantiles.get(key)
+        if sketches is None:
+            seed = len(self._quantiles) * len(self.columns)
+            sketches = self._quantiles[key] = [KLLSketch(self.k, seed + i) for i in range(len(self.columns))]
+            self._moments[key] = RunningMoments(len(self.columns))
+        return sketches
+
+    def update(self, chunk):
+        """
+        Fold one cleaned chunk of rows into the sketches.
+        """
+        ranked = metric_matrix(chunk, self.columns)
+        values = chunk[self.columns].to_numpy(dtype=float)
+        for key, rows in cohort_row_ids(chunk).items():
+            for i, sketch in enumerate(self._sketches(key)):
+                sketch.update_many(ranked[rows, i])
+            self._moments[key].update_many(values[rows])
+
+        positions = chunk['Position']
+        self.positions.update(positions.dropna().astype(str))
+        for level, rows in chunk.groupby('Level', sort=False, observed=True).indices.items():
+            level_positions = positions.iloc[rows]
+            groups = {position: rows[level_positions.to_numpy() == position] for position in level_positions.dropna().unique()}
+            for name, members in composite_positions.items():
+                groups[name] = rows[level_positions.isin(members).to_numpy()]
+            for position, position_rows in groups.items():
+                if len(position_rows):
+                    moments = self._position_moments.setdefault((level, position), RunningMoments(len(self.columns)))
+                    moments.update_many(values[position_rows])
+        self.rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        """
+        Fold in sketches built from another chunk, file or organization.
+        """
+        for key, sketches in other._quantiles.items():
+            for sketch, other_sketch in zip(self._sketches(key), sketches):
+                sketch.merge(other_sketch)
+            self._moments[key].merge(other._moments[key])
+        for key, moments in other._position_moments.items():
+            self._position_moments.setdefault(key, RunningMoments(len(self.columns))).merge(moments)
+        self.positions |= other.positions
+        self.rows += other.rows
+        return self
+
+    def cohorts(self):
+        return list(self._quantiles)
+
+    def size(self, group_by, group_value):
+        sketches = self._quantiles.get(cohort_key(group_by, group_value))
+        return 0 if sketches is None else sketches[0].n
+
+    def percentiles(self, group_by, group_value, values):
+        """
+        Approximate percentiles (0-1) of `values` within the cohort, one value per column
+        or a (players x columns) array. Missing values score 0.
+        """
+        sketches = self._quantiles.get(cohort_key(group_by, group_value))
+        if sketches is None:
+            return None
+        values = np.asarray(values, dtype=float)
+        # Rank in the dataset's float32 storage type, as PercentileIndex does
+        queries = np.atleast_2d(values).astype(np.float32).astype(float)
+        result = np.empty(queries.shape, dtype=float)
+        with stage('sketch_lookup'):
+            for i, sketch in enumerate(sketches):
+                result[:, i] = sketch.rank(queries[:, i])
+        result[np.isnan(queries)] = 0.0
+        return result[0] if values.ndim == 1 else result
+
+    def ladder(self, keys, values):
+        """
+        Approximate (cohorts x columns) percentiles of one player against each cohort in `keys`.
+        """
+        result = np.full((len(keys), len(self.columns)), np.nan)
+        for row, (group_by, group_value) in enumerate(keys):
+            percentiles = self.percentiles(group_by, group_value, values)
+            if percentiles is not None:
+                result[row] = percentiles
+        return result
+
+    def group_average(self, group_by, group_value):
+        # 0.5 for any group larger than one, as in PercentileIndex (which also knows when a column is constant)
+        n = self.size(group_by, group_value)
+        if n == 0:
+            return None
+        return np.full(len(self.columns), 0.5 if n > 1 else 0.0)
+
+    def moments(self, group_by, group_value):
+        return self._moments.get(cohort_key(group_by, group_value))
+
+    def position_moments(self, level, position):
+        return self._position_moments.get((level, position))
+
+    def sample(self, group_by, group_value, column, points=DENSITY_SAMPLE_POINTS):
+        """
+        Evenly spaced quantiles of one cohort's column, standing in for its raw values.
+        """
+        sketches = self._quantiles.get(cohort_key(group_by, group_value))
+        if sketches is None:
+            return np.empty(0)
+        return sketches[self.columns.index(column)].quantile(points)
+
+
+def read_chunks(csv_path, chunk_rows=CHUNK_ROWS):
+    """
+    Cleaned chunks of the CSV followed by every ingested session batch.
+    """
+    reader = pd.read_csv(
+        csv_path, encoding='utf-8-sig', usecols=lambda column: column.strip() in used_columns, dtype={'ID': str}, chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        # Same normalization as dataset.read_source
+        chunk.columns = [column.strip() for column in chunk.columns]
+        yield clean_dataset(chunk.dropna(how='all'))
+    yield from iter_sessions(csv_path, chunk_rows)
+
+
+@timed('sketch_build')
+def build_sketches(csv_path=DEFAULT_CSV, chunk_rows=CHUNK_ROWS, k=DEFAULT_K):
+    """
+    Stream the source through fresh sketches and persist them next to the CSV.
+    """
+    signature = source_signature(csv_path)
+    sketches = CohortSketches(k=k)
+    for chunk in read_chunks(csv_path, chunk_rows):
+        sketches.update(chunk)
+    try:
+        write_pickle(sidecar_path(csv_path, SKETCH_SUFFIX), {'version': SKETCH_VERSION, 'signature': signature, 'sketches': sketches})
+    except OSError:
+        # A read-only checkout still gets the in-memory sketches
+        pass
+    return sketches
+
+
+def load_sketches(csv_path=DEFAULT_CSV):
+    """
+    Persisted sketches for the CSV, rebuilt when the CSV or its sessions log has changed.
+    """
+    try:
+        with stage('sketch_load'), open(sidecar_path(csv_path, SKETCH_SUFFIX), 'rb') as f:
+            stored = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        stored = None
+    if stored is not None and stored.get('version') == SKETCH_VERSION and stored['signature'] == source_signature(csv_path):
+        return stored['sketches']
+    return build_sketches(csv_path)
+
+
+class StreamingEngine:
+    """
+    The cohort comparisons of `ScoringEngine`, answered from sketches.
+
+    Player lookups and closest matches need individual rows and are not available.
+    """
+
+    def __init__(self, sketches):
+        self.sketches = sketches
+        self.percentile_index = sketches
+        self.positions = sorted(sketches.positions) + list(composite_positions)
+        self.rank_error = rank_error(sketches.k)
+
+    def level_comparison(self, input_data, group_by, group_value):
+        if not self.sketches.size(group_by, group_value):
+            return None
+        return {
+            'input_percentiles': self.sketches.percentiles(group_by, group_value, input_data),
+            'comparison_percentiles': self.sketches.group_average(group_by, group_value),
+            'label': f"{group_value} {group_by} Average",
+        }
+
+    def mean_std_comparison(self, input_metrics, group_by, group_value):
+        moments = self.sketches.moments(group_by, group_value)
+        if moments is None:
+            return None
+        average_values = moments.mean()[:len(metrics)]
+        std_devs = moments.std()[:len(metrics)] / average_values  # Std dev as a percentage of the mean
+        input_normalized = [input_metrics[metric] / avg for metric, avg in zip(metrics, average_values)]
+        return {
+            'average_values': average_values,
+            'std_devs': std_devs,
+            'input_normalized': input_normalized,
+        }
+
+    def position_comparison(self, input_data, level, position):
+        moments = self.sketches.position_moments(level, position)
+        if moments is None or not self.sketches.size('Level', level):
+            return None
+        return {
+            'input_percentiles': self.sketches.percentiles('Level', level, input_data),
+            'comparison_percentiles': self.sketches.percentiles('Level', level, moments.mean()),
+            'label': f"{position} Average in {level}",
+        }
+
+    def level_ladder(self, input_data):
+        keys = ladder_cohorts(self.sketches, self.positions)
+        return {'cohorts': keys, 'percentiles': self.sketches.ladder(keys, input_data)}
+
+    def cohort_values(self, group_by, group_value, metric):
+        return self.sketches.sample(group_by, group_value, metric)
+
+
+def load_streaming_engine(csv_path=DEFAULT_CSV):
+    """
+    Shared StreamingEngine for the CSV, rebuilt only when the source changes.
+    """
+    key = os.path.abspath(csv_path)
+    signature = source_signature(key)
+    cached = _engines.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _lock:
+        cached = _engines.get(key)
+        if cached is None or cached[0] != signature:
+            cached = _engines[key] = (signature, StreamingEngine(load_sketches(key)))
+    return cached[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build streaming-mode cohort sketches for a large dataset.")
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV, help="Source dataset")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Rows parsed per chunk")
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help="Sketch accuracy parameter")
+    args = parser.parse_args()
+
+    sketches = build_sketches(args.csv, args.chunk_rows, args.k)
+    print(
+        f"Sketched {sketches.rows} rows into {len(sketches.cohorts())} cohorts at {sidecar_path(args.csv, SKETCH_SUFFIX)} "
+        f"(each percentile within ±{rank_error(args.k) * 100:.2f} points at 99% confidence)"
+    )
+
+
+if __name__ == '__main__':
+    main()
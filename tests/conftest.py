@@ -0,0 +1,20 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def exports(tmp_path):
+    """
+    Copies of the bundled exports in a scratch directory, so caches and sessions logs stay out of the checkout.
+    """
+    paths = {}
+    for filename in ('CleanHPdata4.csv', 'CleanHPdata2.0.csv', 'CleanHPdata2.1.csv'):
+        paths[filename] = str(tmp_path / filename)
+        shutil.copy(os.path.join(ROOT, filename), paths[filename])
+    return paths
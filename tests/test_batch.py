@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch import score_roster
+from dataset import all_metrics, load_dataset, metrics
+from scoring import ScoringEngine
+
+
+def test_blank_metrics_stay_blank(exports):
+    data = load_dataset(exports['CleanHPdata4.csv'])
+    engine = ScoringEngine(data)
+    roster = pd.DataFrame({
+        'Level': ['College', 'College'],
+        'Grip Strength (Bottom Hand)': [60.0, np.nan],
+        'Grip Strength (Top Hand)': [58.0, 58.0],
+        'Vertical Jump': [28.0, np.nan],
+        'Med Ball SitUp': [22.0, 22.0],
+        'Med Ball Chest': [21.0, 21.0],
+    })
+    results = score_roster(roster, data, engine.percentile_index, engine.match_index())
+
+    complete, blank = results.iloc[0], results.iloc[1]
+    assert all(pd.notna(complete[f"{metric} Percentile"]) for metric in all_metrics)
+    assert pd.isna(blank['Horsepower'])
+    for metric in ('Grip Strength (Bottom Hand)', 'Vertical Jump', 'Horsepower'):
+        assert pd.isna(blank[f"{metric} Percentile"])
+    for metric in ('Grip Strength (Top Hand)', 'Med Ball SitUp', 'Med Ball Chest'):
+        assert blank[f"{metric} Percentile"] == complete[f"{metric} Percentile"]
+
+
+def test_incomplete_rows_get_closest_matches(exports):
+    data = load_dataset(exports['CleanHPdata4.csv'])
+    engine = ScoringEngine(data)
+    index = engine.match_index()
+    rng = np.random.default_rng(4)
+    roster = data[metrics].sample(40, random_state=4).reset_index(drop=True).astype(float)
+    roster += rng.normal(0, 1, roster.shape)
+    for i, metric in enumerate(metrics):
+        roster.loc[i::len(metrics) + 1, metric] = np.nan
+    results = score_roster(roster, data, engine.percentile_index, index, group_value='College')
+
+    values = np.column_stack((roster.to_numpy(), roster['Vertical Jump'] + roster['Med Ball SitUp'] + roster['Med Ball Chest']))
+    assert np.isnan(values).any(axis=1).sum() > len(roster) // 2
+    for (_, result), player in zip(results.iterrows(), values):
+        found, distances = index.query(player, k=1)
+        match = data.iloc[found[0]]
+        assert result['Closest Match'] == f"{match['First Name']} {match['Last Name']}"
+        assert result['Match Distance'] == pytest.approx(distances[0], abs=1e-3)
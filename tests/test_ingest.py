@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort_cube import CUBE_SUFFIX, CohortCube, build_cube, load_cube
+from dataset import SESSIONS_SUFFIX, all_metrics, load_dataset, read_sessions, read_sessions_from, sidecar_path
+from ingest import ingest, read_batch
+from scoring import ScoringEngine, load_engine
+
+
+@pytest.mark.parametrize('base, export', [
+    ('CleanHPdata4.csv', 'CleanHPdata4.csv'),
+    ('CleanHPdata2.0.csv', 'CleanHPdata2.0.csv'),
+    ('CleanHPdata2.1.csv', 'CleanHPdata2.1.csv'),
+    ('CleanHPdata2.0.csv', 'CleanHPdata2.1.csv'),
+    ('CleanHPdata2.1.csv', 'CleanHPdata2.0.csv'),
+])
+def test_loaded_export_appends_nothing(exports, base, export):
+    summary = ingest([exports[export]], exports[base])
+    assert summary['appended'] == 0
+    assert read_sessions(exports[base]) == []
+
+
+def test_ingest_is_idempotent(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    first = ingest([exports['CleanHPdata2.0.csv']], csv_path)
+    assert first['appended'] > 0
+    for export in ('CleanHPdata2.0.csv', 'CleanHPdata2.1.csv', 'CleanHPdata4.csv'):
+        assert ingest([exports[export]], csv_path)['appended'] == 0
+    assert len(load_dataset(csv_path)) == first['players']
+
+
+def test_batch_rows_match_the_source(exports):
+    batch = read_batch(exports['CleanHPdata4.csv'])
+    data = load_dataset(exports['CleanHPdata4.csv'])
+    pd.testing.assert_frame_equal(batch, data[batch.columns])
+
+    # Horsepower stays missing where the export has none instead of being recomputed
+    raw = pd.read_csv(exports['CleanHPdata4.csv'], encoding='utf-8-sig')
+    raw.columns = [column.strip() for column in raw.columns]
+    blank = raw['Horsepower'].isna().to_numpy()
+    assert blank.any()
+    assert batch['Horsepower'].isna().to_numpy().tolist() == blank.tolist()
+
+
+def test_retest_with_new_numbers_is_appended(exports, tmp_path):
+    csv_path = exports['CleanHPdata4.csv']
+    retest = read_batch(csv_path).head(3)
+    retest['Vertical Jump'] += 1
+    path = tmp_path / 'retest.csv'
+    retest.to_csv(path, index=False)
+    assert ingest([str(path)], csv_path)['appended'] == 3
+    assert ingest([str(path)], csv_path)['appended'] == 0
+
+
+def test_running_engine_folds_in_new_sessions(exports, tmp_path):
+    csv_path = exports['CleanHPdata4.csv']
+    engine = load_engine(csv_path)
+    summary = ingest([exports['CleanHPdata2.0.csv']], csv_path)
+
+    updated = load_engine(csv_path)
+    assert len(updated.data) == len(engine.data) + summary['appended']
+    rebuilt = ScoringEngine(load_dataset(csv_path))
+    player = np.array([60.0, 62.0, 28.0, 24.0, 22.0, 75.0])
+    for level in ('Youth', 'High School', 'College', 'Minors', 'MLB'):
+        np.testing.assert_allclose(
+            updated.level_comparison(player, 'Level', level)['input_percentiles'],
+            rebuilt.level_comparison(player, 'Level', level)['input_percentiles'],
+        )
+
+
+def test_updated_cube_matches_a_full_rebuild(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    load_cube(csv_path)
+    assert ingest([exports['CleanHPdata2.0.csv']], csv_path)['appended'] > 0
+
+    updated = CohortCube.load(sidecar_path(csv_path, CUBE_SUFFIX))
+    rebuilt = build_cube(csv_path, workers=1)
+    assert sorted(map(tuple, updated.manifest['cohorts']), key=repr) == sorted(map(tuple, rebuilt.manifest['cohorts']), key=repr)
+    for key in rebuilt.manifest['cohorts']:
+        cell, expected = updated.cell(*key), rebuilt.cell(*key)
+        assert updated.sizes[cell] == rebuilt.sizes[expected]
+        np.testing.assert_array_equal(updated.counts[cell], rebuilt.counts[expected])
+        np.testing.assert_allclose(updated.means[cell], rebuilt.means[expected], rtol=1e-9)
+        np.testing.assert_allclose(updated.stds[cell], rebuilt.stds[expected], rtol=1e-9)
+
+
+def test_sessions_log_is_read_back_exactly(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    summary = ingest([exports['CleanHPdata2.0.csv']], csv_path)
+    appended = load_dataset(csv_path).tail(summary['appended']).reset_index(drop=True)
+    logged = read_sessions(csv_path)[0]
+    pd.testing.assert_frame_equal(logged[all_metrics + ['Age']], appended[all_metrics + ['Age']])
+
+
+def test_partly_written_row_waits_for_its_newline(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    ingest([exports['CleanHPdata2.0.csv']], csv_path)
+    path = sidecar_path(csv_path, SESSIONS_SUFFIX)
+    with open(path, 'rb') as f:
+        log = f.read()
+    last_row = log[log.rstrip(b'\n').rfind(b'\n') + 1:]
+
+    with open(path, 'wb') as f:
+        f.write(log[:-len(last_row)] + last_row[:10])
+    _, offset = read_sessions_from(csv_path)
+    assert offset == len(log) - len(last_row)
+
+    with open(path, 'wb') as f:
+        f.write(log)
+    rows, offset = read_sessions_from(csv_path, offset)
+    assert len(rows[0]) == 1 and offset == len(log)
+
+
+def test_damaged_sessions_log_fails_loudly(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    ingest([exports['CleanHPdata2.0.csv']], csv_path)
+    path = sidecar_path(csv_path, SESSIONS_SUFFIX)
+    with open(path, 'rb') as f:
+        log = bytearray(f.read())
+    log[len(log) // 2] = 0xff
+    with open(path, 'wb') as f:
+        f.write(log)
+    with pytest.raises(ValueError, match='Sessions log'):
+        read_sessions(csv_path)
+
+
+def test_fractional_ages_are_found_as_typed(exports, tmp_path):
+    csv_path = exports['CleanHPdata4.csv']
+    batch = read_batch(csv_path).head(2)
+    batch['Age'] = 16.3
+    batch['Vertical Jump'] += 1
+    path = tmp_path / 'fractional.csv'
+    batch.to_csv(path, index=False)
+    assert ingest([str(path)], csv_path)['appended'] == 2
+
+    age = float(pd.to_numeric('16.3'))
+    engine = load_engine(csv_path)
+    assert engine.percentile_index.size('Age', age) == 2
+    assert load_cube(csv_path).size(age=age) == 2
+    assert ScoringEngine(load_dataset(csv_path)).level_comparison(np.zeros(6), 'Age', age) is not None
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from dataset import all_metrics, anthropometric_columns, load_dataset
+from matching import ClosestMatchIndex
+
+
+def brute_force(index, values, level=None):
+    """
+    Distances from `values` to every indexed row, over the dimensions both sides have.
+    """
+    query = index.standardize(values)
+    features = np.where(index.observed, index.features, np.nan)
+    diff = features - query
+    shared = ~np.isnan(diff)
+    distances = np.sqrt(np.nansum(diff ** 2, axis=1) * (~np.isnan(query)).sum() / shared.sum(axis=1))
+    if level is not None:
+        distances[index.levels != level] = np.inf
+    return distances
+
+
+@pytest.fixture
+def data(exports):
+    return load_dataset(exports['CleanHPdata4.csv'])
+
+
+def players(index, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return index.mean + rng.normal(0, 1, (count, len(index.columns))) * index.scale
+
+
+@pytest.mark.parametrize('level', [None, 'High School', 'MLB'])
+def test_matches_brute_force(data, level):
+    index = ClosestMatchIndex(data)
+    for values in players(index, 25):
+        rows, distances = index.query(values, k=5, level=level)
+        expected = brute_force(index, values, level)
+        order = np.argsort(expected, kind='stable')[:5]
+        np.testing.assert_allclose(distances, expected[order])
+        assert rows[0] == index.row_ids[order[0]]
+
+
+def test_missing_values_match_brute_force(data):
+    index = ClosestMatchIndex(data, anthropometric_columns)
+    assert not index.complete
+    queries = players(index, 25, seed=1)
+    queries[::2, len(all_metrics):] = np.nan
+    for values in queries:
+        rows, distances = index.query(values, k=3)
+        expected = brute_force(index, values)
+        np.testing.assert_allclose(distances, np.sort(expected)[:3])
+        assert rows[0] == index.row_ids[np.argmin(expected)]
+
+
+@pytest.mark.parametrize('extra_columns', [(), anthropometric_columns])
+def test_query_many_agrees_with_query(data, extra_columns):
+    index = ClosestMatchIndex(data, extra_columns)
+    queries = players(index, 60, seed=2)
+    queries[::3, 1] = np.nan
+    queries[1::4, 4:] = np.nan
+    queries[2::5, 0] = np.nan
+    rows, distances = index.query_many(queries)
+    for values, row, distance in zip(queries, rows, distances):
+        found, found_distances = index.query(values, k=1)
+        assert row == found[0]
+        assert distance == pytest.approx(found_distances[0])
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from dataset import load_dataset
+from ingest import ingest
+from names import FUZZY_WINDOW, NameIndex
+from scoring import load_engine
+
+
+def roster(*names):
+    first, last = zip(*(name.split(' ', 1) for name in names))
+    return pd.DataFrame({'First Name': first, 'Last Name': last})
+
+
+def test_prefix_matches_come_back_sorted_in_either_order():
+    index = NameIndex(roster('Mike Trout', 'Mike Piazza', 'Mookie Betts', 'Tim Mikes'))
+    assert [name for name, _ in index.search('mik')] == ['Mike Piazza', 'Mike Trout', 'Tim Mikes']
+    assert [name for name, _ in index.search('betts m')] == ['Mookie Betts']
+
+
+def test_lookup_and_search_ignore_case_and_spacing():
+    index = NameIndex(roster('Mike Trout', 'mike  TROUT', 'Mookie Betts'))
+    assert index.lookup('  MIKE trout ') == [0, 1]
+    assert index.search('MOOKIE', limit=1) == [('Mookie Betts', [2])]
+
+
+def test_fuzzy_fallback_fills_up_after_prefix_hits():
+    index = NameIndex(roster('Mike Trout', 'Mookie Betts'))
+    assert index.prefix('mike trot') == []
+    assert [name for name, _ in index.search('mike trot')] == ['Mike Trout']
+
+
+def test_fuzzy_candidates_are_bounded():
+    assert NameIndex(roster('Aa Smith')).fuzzy('ac smith') == ['aa smith']
+
+    # Enough names sort between the query and its close match to push it out of the window
+    fillers = [f"Ab{i:06d} Ba" for i in range(2 * FUZZY_WINDOW)]
+    index = NameIndex(roster('Aa Smith', *fillers))
+    assert index.fuzzy('ac smith') == []
+    assert index.fuzzy('aa smitj') == ['aa smith']
+
+
+def test_with_rows_finds_ingested_players(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    engine = load_engine(csv_path)
+    before = len(engine.data)
+    assert ingest([exports['CleanHPdata2.0.csv']], csv_path)['appended'] > 0
+
+    updated = load_engine(csv_path)
+    rebuilt = NameIndex(load_dataset(csv_path))
+    assert len(updated.names) == len(rebuilt)
+    names = (updated.data['First Name'].fillna('') + ' ' + updated.data['Last Name'].fillna('')).str.strip()
+    ingested = [row for row in range(before, len(updated.data)) if names.iloc[row]]
+    assert ingested
+    for row in ingested[:20]:
+        assert row in updated.names.lookup(names.iloc[row])
+        assert updated.names.search(names.iloc[row], limit=50) == rebuilt.search(names.iloc[row], limit=50)
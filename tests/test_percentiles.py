@@ -0,0 +1,79 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import quantile_transform
+
+from dataset import all_metrics, levels, read_source
+from percentiles import PercentileIndex, cohort_row_ids
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'CleanHPdata4.csv')
+
+
+@pytest.fixture(scope='module')
+def data():
+    return read_source(CSV_PATH)
+
+
+@pytest.fixture(scope='module')
+def index(data):
+    return PercentileIndex(data)
+
+
+def cohorts(data):
+    for group_by in ('Level', 'Age', 'Position'):
+        for group_value, group in data.groupby(group_by, observed=True):
+            yield group_by, group_value, group
+
+
+def baseline_percentiles(group, values):
+    # The original per-metric loop
+    return np.array([
+        np.sum(pd.to_numeric(group[metric], errors='coerce').fillna(0) < value) / len(group)
+        for metric, value in zip(all_metrics, values)
+    ])
+
+
+def test_percentiles_match_the_baseline(data, index):
+    rng = np.random.default_rng(0)
+    for group_by, group_value, group in cohorts(data):
+        # Exact cohort values (ties) and values in between
+        queries = [group[all_metrics].iloc[0].fillna(0).to_numpy(dtype=float)]
+        queries.append(group[all_metrics].mean().to_numpy() + rng.normal(0, 3, len(all_metrics)))
+        for values in queries:
+            np.testing.assert_allclose(index.percentiles(group_by, group_value, values), baseline_percentiles(group, values))
+
+
+def test_group_average_matches_quantile_transform(data, index):
+    for group_by, group_value, group in cohorts(data):
+        with warnings.catch_warnings():
+            # quantile_transform warns when a group has fewer rows than its quantiles
+            warnings.simplefilter('ignore')
+            expected = [
+                quantile_transform(pd.to_numeric(group[metric], errors='coerce').fillna(0).to_numpy().reshape(-1, 1), output_distribution='uniform').mean()
+                for metric in all_metrics
+            ]
+        np.testing.assert_allclose(index.group_average(group_by, group_value), expected, atol=0.03)
+
+
+def test_ladder_matches_percentiles(index):
+    keys = [('Level', level) for level in levels] + [('Position', 'Catcher'), ('Position', 'Middle Infield'), ('Level', 'Nowhere')]
+    values = np.array([55.0, 57.0, 25.5, 20.0, np.nan, 65.0])
+    ladder = index.ladder(keys, values)
+    for row, key in zip(ladder, keys):
+        expected = index.percentiles(*key, values)
+        if expected is None:
+            assert np.isnan(row).all()
+        else:
+            np.testing.assert_array_equal(row, expected)
+
+
+def test_with_values_matches_rebuild(data):
+    base, added = data.iloc[:400].reset_index(drop=True), data.iloc[400:].reset_index(drop=True)
+    extended = PercentileIndex(base).with_values({key: added.iloc[rows] for key, rows in cohort_row_ids(added).items()})
+    rebuilt = PercentileIndex(data)
+    assert sorted(map(str, extended.cohorts())) == sorted(map(str, rebuilt.cohorts()))
+    for key in rebuilt.cohorts():
+        np.testing.assert_array_equal(extended.sorted_values(*key), rebuilt.sorted_values(*key))
@@ -0,0 +1,31 @@
+import os
+import re
+
+from dataset import load_dataset, metrics
+from reports import build_reports, generate_reports
+from scoring import load_engine
+
+
+def page_count(path):
+    with open(path, 'rb') as f:
+        return len(re.findall(rb'/Type /Page\b', f.read()))
+
+
+def test_reports_for_a_small_roster(exports, tmp_path):
+    csv_path = exports['CleanHPdata4.csv']
+    data = load_dataset(csv_path)
+    roster = data[data[metrics].notna().all(axis=1) & data['Level'].notna()].head(2).reset_index(drop=True)
+    charts = sum(len(report['charts']) for report in build_reports(roster, load_engine(csv_path)))
+
+    paths = generate_reports(roster, str(tmp_path / 'pdf'), csv_path, workers=2)
+    assert len(paths) == 2
+    assert sum(page_count(path) for path in paths) == charts
+
+    pngs = generate_reports(roster, str(tmp_path / 'png'), csv_path, fmt='png', workers=2)
+    assert len(pngs) == charts and all(os.path.getsize(path) for path in pngs)
+
+    [combined] = generate_reports(roster, str(tmp_path / 'combined'), csv_path, combined=True)
+    assert page_count(combined) == charts
+    with open(combined, 'rb') as f:
+        # Vector pages, not embedded raster images
+        assert b'/Subtype /Image' not in f.read()
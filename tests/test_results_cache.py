@@ -0,0 +1,64 @@
+import threading
+
+from results_cache import ResultCache, input_key
+
+
+def fill(cache, *keys, value=None):
+    for key in keys:
+        cache.get(key, lambda key=key: key if value is None else value)
+
+
+def test_least_recently_used_entry_is_dropped():
+    cache = ResultCache(maxsize=2)
+    fill(cache, 'a', 'b')
+    assert cache.get('a', lambda: 'recomputed') == 'a'
+    fill(cache, 'c')
+    assert len(cache) == 2
+    assert cache.get('b', lambda: 'recomputed') == 'recomputed'
+    assert cache.get('a', lambda: 'recomputed') == 'recomputed'
+
+
+def test_hits_do_not_recompute():
+    calls = []
+    cache = ResultCache()
+    for _ in range(3):
+        assert cache.get('key', lambda: calls.append(1) or 'value') == 'value'
+    assert len(calls) == 1
+
+
+def test_byte_bound_evicts_oldest_images():
+    cache = ResultCache(maxsize=100, maxbytes=10)
+    fill(cache, 'a', 'b', value=b'1234')
+    assert cache.nbytes == 8
+    fill(cache, 'c', value=b'1234')
+    assert len(cache) == 2 and cache.nbytes == 8
+    assert cache.get('a', lambda: b'') == b''
+
+    # An image larger than the whole budget is returned but not kept
+    assert cache.get('big', lambda: b'x' * 11) == b'x' * 11
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_racing_computations_are_counted_once():
+    cache = ResultCache(maxbytes=100)
+    started, release = threading.Barrier(2), threading.Event()
+
+    def compute():
+        started.wait()
+        release.wait()
+        return b'12345'
+
+    threads = [threading.Thread(target=cache.get, args=('key', compute)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 1 and cache.nbytes == 5
+
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_input_key_treats_equal_inputs_alike():
+    assert input_key([60, float('nan')]) == input_key([60.0, float('nan')])
@@ -0,0 +1,114 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from dataset import metrics
+from server import MAX_BODY_SIZE, MAX_MATCHES, PooledHTTPServer, ScoringRequestHandler
+
+player = {
+    'Grip Strength (Bottom Hand)': 64.2, 'Grip Strength (Top Hand)': 60, 'Vertical Jump': 28.5,
+    'Med Ball SitUp': 24, 'Med Ball Chest': 22,
+}
+
+
+@pytest.fixture
+def server(exports):
+    server = PooledHTTPServer(('127.0.0.1', 0), ScoringRequestHandler, exports['CleanHPdata4.csv'], workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    connection.putrequest('POST', '/score')
+    for name, value in (headers or {}).items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def post_json(server, request):
+    body = json.dumps(request).encode('utf-8')
+    return post(server, body, {'Content-Length': str(len(body))})
+
+
+def test_score(server):
+    status, result = post_json(server, {'metrics': player, 'group_value': 'College', 'matches': 2})
+    assert status == 200
+    assert result['cohort']['group_value'] == 'College'
+    assert len(result['closest_matches']) == 2
+    # float32 values come back rounded, not as e.g. 64.19999694824219
+    for row in result['closest_matches']:
+        for metric in metrics:
+            assert row[metric] is None or row[metric] == round(row[metric], 2)
+
+
+def test_listen_backlog(server):
+    assert server.request_queue_size > 5
+
+
+@pytest.mark.parametrize('headers, status', [
+    ({}, 411),
+    ({'Content-Length': 'abc'}, 400),
+    ({'Content-Length': '-1'}, 400),
+    ({'Content-Length': str(MAX_BODY_SIZE + 1)}, 413),
+])
+def test_content_length(server, headers, status):
+    assert post(server, None, headers)[0] == status
+
+
+@pytest.mark.parametrize('options', [
+    {'matches': 0},
+    {'matches': -2},
+    {'matches': 1.5},
+    {'matches': '3'},
+    {'matches': True},
+    {'matches': MAX_MATCHES + 1},
+    {'group_by': ['Level']},
+    {'group_by': 'Team'},
+    {'group_value': ['College']},
+    {'group_value': {'Level': 'College'}},
+])
+def test_invalid_options(server, options):
+    status, result = post_json(server, dict({'metrics': player}, **options))
+    assert status == 400
+    assert 'error' in result
+
+
+@pytest.mark.parametrize('request_body, message', [
+    ([1, 2], "the body must be a JSON object"),
+    ({}, "'metrics' must be a JSON object"),
+    ({'metrics': [60]}, "'metrics' must be a JSON object"),
+    ({'metrics': dict(player, **{'Vertical Jump': 'high'})}, "non-numeric metrics: Vertical Jump"),
+])
+def test_invalid_metrics_are_explained(server, request_body, message):
+    status, result = post_json(server, request_body)
+    assert status == 400
+    assert message in result['error']
+
+
+def test_missing_metrics_are_listed(server):
+    partial = {metric: value for metric, value in player.items() if metric not in ('Grip Strength (Top Hand)', 'Med Ball Chest')}
+    status, result = post_json(server, {'metrics': dict(partial, **{'Vertical Jump': True})})
+    assert status == 400
+    assert 'missing metrics: Grip Strength (Top Hand), Med Ball Chest' in result['error']
+    assert 'non-numeric metrics: Vertical Jump' in result['error']
+
+
+def test_scoring_failure(server, monkeypatch):
+    import scoring
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(scoring.ScoringEngine, 'score', fail)
+    status, result = post_json(server, {'metrics': player})
+    assert status == 500
+    assert 'boom' in result['error']
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from sketches import KLLSketch, RunningMoments, rank_error
+
+
+def true_ranks(values, points):
+    return np.searchsorted(np.sort(values), points, side='left') / len(values)
+
+
+def retained(sketch):
+    return sum(len(items) for items in sketch.levels)
+
+
+def rank_errors(sketch, values):
+    points = np.quantile(values, np.linspace(0.01, 0.99, 99))
+    return np.abs(sketch.rank(points) - true_ranks(values, points))
+
+
+def assert_within_bound(errors, k):
+    # The bound holds for each query with 99% confidence, not for the worst of many
+    assert np.mean(errors > rank_error(k)) <= 0.01
+
+
+def test_rank_error_within_bound():
+    errors = []
+    for seed in range(5):
+        rng = np.random.default_rng(seed)
+        values = rng.lognormal(3, 0.5, 200_000)
+        sketch = KLLSketch(seed=seed)
+        for chunk in np.array_split(values, 50):
+            sketch.update_many(chunk)
+
+        errors.append(rank_errors(sketch, values))
+        assert len(sketch) == len(values)
+        assert retained(sketch) <= 3 * sketch.k + 2 * len(sketch.levels)
+    assert_within_bound(np.concatenate(errors), sketch.k)
+
+
+def test_merged_sketches_within_bound():
+    errors = []
+    for seed in range(5):
+        rng = np.random.default_rng(seed + 7)
+        parts = [rng.normal(loc, 5, 40_000) for loc in (20, 25, 30, 35)]
+        merged = KLLSketch(seed=seed)
+        for i, part in enumerate(parts):
+            merged.merge(KLLSketch(seed=10 * seed + i + 1).update_many(part))
+
+        values = np.concatenate(parts)
+        errors.append(rank_errors(merged, values))
+        assert merged.n == len(values)
+    assert_within_bound(np.concatenate(errors), merged.k)
+
+
+def test_small_inputs_are_exact():
+    values = np.arange(150.0)
+    sketch = KLLSketch().update_many(values)
+    np.testing.assert_array_equal(sketch.rank(values), true_ranks(values, values))
+
+
+def test_merge_requires_same_k():
+    with pytest.raises(ValueError):
+        KLLSketch(k=100).merge(KLLSketch(k=200))
+
+
+def test_running_moments_match_numpy():
+    rng = np.random.default_rng(3)
+    values = rng.normal(50, 10, (5000, 3))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    moments = RunningMoments(3)
+    for chunk in np.array_split(values, 7):
+        moments.merge(RunningMoments(3).update_many(chunk))
+    np.testing.assert_allclose(moments.mean(), np.nanmean(values, axis=0))
+    np.testing.assert_allclose(moments.std(), np.nanstd(values, axis=0, ddof=1))
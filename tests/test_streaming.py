@@ -0,0 +1,35 @@
+import numpy as np
+
+from dataset import all_metrics, iter_sessions, load_dataset, read_sessions
+from ingest import ingest
+from scoring import ScoringEngine
+from sketches import rank_error
+from streaming import StreamingEngine, build_sketches
+
+
+def test_sessions_are_read_in_chunks(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    appended = ingest([exports['CleanHPdata2.0.csv']], csv_path)['appended']
+    chunks = list(iter_sessions(csv_path, 3))
+    assert len(chunks) == -(-appended // 3)
+    assert all(len(chunk) <= 3 for chunk in chunks)
+    assert sum(map(len, chunks)) == len(read_sessions(csv_path)[0]) == appended
+
+
+def test_streaming_percentiles_match_the_exact_index(exports):
+    csv_path = exports['CleanHPdata4.csv']
+    ingest([exports['CleanHPdata2.0.csv']], csv_path)
+    data = load_dataset(csv_path)
+    sketches = build_sketches(csv_path, chunk_rows=100)
+    assert sketches.rows == len(data)
+
+    streaming, exact = StreamingEngine(sketches), ScoringEngine(data)
+    players = data[all_metrics].dropna().sample(20, random_state=0).to_numpy(dtype=float)
+    errors = []
+    for level in data['Level'].dropna().unique():
+        assert sketches.size('Level', level) == exact.percentile_index.size('Level', level)
+        for player in players:
+            approximate = streaming.level_comparison(player, 'Level', level)['input_percentiles']
+            errors.append(np.abs(approximate - exact.level_comparison(player, 'Level', level)['input_percentiles']))
+    # The bound holds for each query with 99% confidence
+    assert np.mean(np.concatenate(errors) > rank_error(sketches.k)) <= 0.01